@@ -4,8 +4,10 @@ also handles the IO operations required to succesfully store results and wraps
 the required functionality for easier debugging.
 """
 import os
+import io
 import bz2
 import traceback
+import multiprocessing
 
 import numpy as _np
 import fitsio
@@ -19,12 +21,13 @@ from cv2 import (CHAIN_APPROX_NONE,  # noqa: F401
 
 from lfd.detecttrails.sdss import files
 from lfd.detecttrails.removestars import remove_stars
+from lfd.detecttrails import processfield
 from lfd.detecttrails.processfield import (process_field_bright,
                                            process_field_dim,
                                            setup_debug)
 
 
-__all__ = ["DetectTrails", "process_field"]
+__all__ = ["DetectTrails", "process_field", "process_field_batch"]
 
 
 def process_field(results, errors, run, camcol, filter, field, params_bright,
@@ -124,11 +127,11 @@ def process_field(results, errors, run, camcol, filter, field, params_bright,
         img = cv2.flip(img, 0)
         detection, res = process_field_bright(img, **params_bright)
         if detection:
-            results.write(printit + f"{res['x1']} {res['y1']} {res['x2']} {res['y2']}\n")
+            results.write(printit + f"{res.x1} {res.y1} {res.x2} {res.y2}\n")
         else:
             detection, res = process_field_dim(img, **params_dim)
             if detection:
-                results.write(printit + f"{res['x1']} {res['y1']} {res['x2']} {res['y2']}\n")
+                results.write(printit + f"{res.x1} {res.y1} {res.x2} {res.y2}\n")
 
     except Exception as e:
         if params_bright["debug"] or params_dim["debug"]:
@@ -143,6 +146,104 @@ def process_field(results, errors, run, camcol, filter, field, params_bright,
             os.remove(fitspath)
 
 
+def _init_worker(counter=None, ndevices=0):
+    """Initializes a process_field_batch worker process. Each worker processes
+    a whole field, so OpenCV's own thread pool is limited to a single thread
+    so that the workers do not oversubscribe the CPU.
+
+    When CUDA devices are used each started worker takes the next value of
+    the shared counter and selects the device with that index, wrapping
+    around when there are more workers than devices.
+
+    Parameters
+    ----------
+    counter : multiprocessing.Value
+        shared count of started workers. Default: None, no device is selected
+    ndevices : int
+        number of CUDA devices. Default: 0
+    """
+    cv2.setNumThreads(1)
+    if counter is not None and ndevices > 0:
+        with counter.get_lock():
+            device = counter.value % ndevices
+            counter.value += 1
+        cv2.cuda.setDevice(device)
+
+
+def _process_field_worker(args):
+    """Runs process_field in a worker process. Results and errors are written
+    to in-memory buffers whose contents are returned to the parent process,
+    because open files can not be shared between processes.
+
+    Parameters
+    ----------
+    args : tuple
+        (run, camcol, filter, field, params_bright, params_dim,
+        params_removestars) tuple, see process_field
+    """
+    results, errors = io.StringIO(), io.StringIO()
+    try:
+        process_field(results, errors, *args)
+    finally:
+        # workers do not run exit handlers, queued debug images would be lost
+        processfield._flush_debug()
+    return results.getvalue(), errors.getvalue()
+
+
+def process_field_batch(results, errors, fields, params_bright, params_dim,
+                        params_removestars, processes=None):
+    """Runs process_field for many fields in parallel, each field in its own
+    process. Workers receive only the field designations and read the frames
+    themselves, so no images are sent between processes. Results and errors
+    are written by the calling process, in the order in which the fields were
+    given.
+
+    When OpenCV can use a CUDA device, see processfield.use_cuda, only one
+    worker per device is started by default and each worker runs on its own
+    device, see _init_worker. The CUDA runtime of the calling process can not
+    be used by forked processes so in that case the workers are started as
+    new interpreters instead, which requires the calling script to guard its
+    main code with `if __name__ == "__main__":`.
+
+    Parameters
+    ----------
+    results : file
+        a file object, a stream or any such counterpart to which results
+        will be written
+    errors : file
+        a file object, stream, or any such counterpart to which errors will be
+        written
+    fields : iterable
+        iterable of (run, camcol, filter, field) tuples that will be processed
+    params_bright : dict
+        dictionary containing execution parameters required by process_bright
+    params_dim : dict
+        dictionary containing execution parameters required by process_dim
+    params_removestars : dict
+        dictionary containing execution parameters required by remove_stars
+    processes : int
+        number of worker processes. Default: number of CPUs, or the number of
+        CUDA devices when they are used.
+    """
+    context = multiprocessing.get_context()
+    initargs = ()
+    if processfield.use_cuda():
+        context = multiprocessing.get_context("spawn")
+        ndevices = cv2.cuda.getCudaEnabledDeviceCount()
+        initargs = (context.Value("i", 0), ndevices)
+        if processes is None:
+            processes = ndevices
+
+    tasks = ((run, camcol, filter, field, params_bright, params_dim,
+              params_removestars) for run, camcol, filter, field in fields)
+
+    with context.Pool(processes, initializer=_init_worker,
+                      initargs=initargs) as pool:
+        for res, err in pool.imap(_process_field_worker, tasks):
+            results.write(res)
+            errors.write(err)
+
+
 class DetectTrails:
     """Convenience class that processes targeted SDSS frames.
 
@@ -210,7 +311,11 @@ class DetectTrails:
             "nlinesInSet": 3,
             "lineSetTresh": 0.15,
             "dro": 25,
-            "debug": False
+            "debug": False,
+            "probabilisticHough": False,
+            "houghThreshold": 20,
+            "minTheta": 0,
+            "maxTheta": _np.pi
         }
         self.params_dim = {
             "minFlux": 0.02,
@@ -226,7 +331,11 @@ class DetectTrails:
             "nlinesInSet": 3,
             "lineSetTresh": 0.15,
             "dro": 20,
-            "debug": False
+            "debug": False,
+            "probabilisticHough": False,
+            "houghThreshold": 20,
+            "minTheta": 0,
+            "maxTheta": _np.pi
         }
         self.params_removestars = {
             "pixscale": 0.396,
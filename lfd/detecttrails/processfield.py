@@ -7,6 +7,11 @@ image sources so that the correct order of operations is ensured for different
 directory structures is what makes detecttrails capable of processing variety
 of different images.
 """
+import math
+import atexit
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
 import cv2
 import numpy as np
 import os as os
@@ -18,6 +23,31 @@ __all__ = ["process_field_bright", "process_field_dim", "pathBright"]
 pathBright = None
 pathDim = None
 
+# OpenCV builds with CUDA support run the histogram equalization, morphology
+# and the Hough transform on the GPU. Devices are looked for on first use, see
+# use_cuda, not when the module is imported.
+_use_cuda = None
+
+# pixel coordinates of the two end points of a detected line
+HoughLineXY = namedtuple("HoughLineXY", "x1 y1 x2 y2")
+
+# debug images are compressed and written on a background thread pool which is
+# created on first use, see _debug_imwrite
+_debug_pool = None
+
+
+def use_cuda():
+    """Returns True when OpenCV can use a CUDA device. Builds without CUDA
+    support report no devices. Querying the devices initializes the CUDA
+    runtime, so they are only queried on the first call, in the process that
+    will use them.
+    """
+    global _use_cuda
+    if _use_cuda is None:
+        _use_cuda = (hasattr(cv2, "cuda")
+                     and cv2.cuda.getCudaEnabledDeviceCount() > 0)
+    return _use_cuda
+
 
 def setup_debug():
     """Sets up the module global variables - paths to where the debug output is
@@ -33,6 +63,96 @@ def setup_debug():
         pass
 
 
+def _debug_imwrite(path, image, compression):
+    """Writes a copy of the image as a png on a background thread so that the
+    PNG compression does not stall the detection. A copy is made because the
+    image is often modified in place by the following processing steps.
+    Outstanding writes are waited on when the interpreter exits, see
+    _flush_debug.
+
+    Parameters
+    ----------
+    path : str
+        path, including the name and the extension, of the file
+    image : np.array or cv2.image
+        image to save
+    compression : int
+        cv2.IMWRITE_PNG_COMPRESSION parameter from 0 to 9.
+    """
+    global _debug_pool
+    if _debug_pool is None:
+        _debug_pool = ThreadPoolExecutor(max_workers=2)
+    _debug_pool.submit(cv2.imwrite, path, image.copy(),
+                       [cv2.IMWRITE_PNG_COMPRESSION, compression])
+
+
+def _flush_debug():
+    """Waits until all debug images queued by _debug_imwrite are written.
+    Worker processes, see detecttrails.process_field_batch, exit without
+    running the exit handlers so they have to flush after every field.
+    """
+    global _debug_pool
+    if _debug_pool is not None:
+        _debug_pool.shutdown(wait=True)
+        _debug_pool = None
+
+
+atexit.register(_flush_debug)
+
+
+def _cuda_equalize_morph(img, morphology):
+    """Equalizes the histogram of the image and applies the given sequence of
+    morphological operations to it on the GPU. The image is uploaded once and
+    stays in the device memory until all operations are done.
+
+    Parameters
+    ----------
+    img : np.array
+        numpy array representing gray 8 bit 1 chanel image.
+    morphology : list
+        list of (operation, kernel) pairs, where operation is one of the
+        cv2.MORPH_* constants and kernel the structuring element.
+    """
+    gpuimg = cv2.cuda_GpuMat()
+    gpuimg.upload(img)
+    gpuimg = cv2.cuda.equalizeHist(gpuimg)
+    for op, kernel in morphology:
+        morph = cv2.cuda.createMorphologyFilter(op, cv2.CV_8UC1, kernel)
+        gpuimg = morph.apply(gpuimg)
+    return gpuimg.download()
+
+
+def _cuda_houghLines(img, houghMethod, minTheta=0, maxTheta=np.pi):
+    """Fits Hough lines to the image on the GPU. Lines are returned sorted by
+    the number of votes, in the same format cv2.HoughLines returns them. The
+    CUDA detector always sweeps the full angle range, lines with angles
+    outside of [minTheta, maxTheta] are discarded afterwards.
+
+    Parameters
+    ----------
+    img : np.array
+        numpy array representing gray 8 bit 1 chanel image.
+    houghMethod : int
+        distance resolution, in pixels, of the Hough accumulator
+    minTheta : float
+        minimal angle, in radians, of the returned lines. Default: 0
+    maxTheta : float
+        maximal angle, in radians, of the returned lines. Default: pi
+    """
+    gpuimg = cv2.cuda_GpuMat()
+    gpuimg.upload(img)
+    detector = cv2.cuda.createHoughLinesDetector(houghMethod, np.pi/180, 1,
+                                                 doSort=True)
+    lines = detector.detect(gpuimg).download()
+    if lines is None or lines.size == 0:
+        return None
+
+    lines = lines.reshape(-1, 1, 2)
+    theta = lines[:, 0, 1]
+    lines = lines[(theta >= minTheta) & (theta <= maxTheta)]
+    return lines if len(lines) > 0 else None
+
+
 def check_theta(hough1, hough2, navg, dro, thetaTresh, lineSetTresh, debug):
     """
     Comapres colinearity between lines in each set of lines provided and
@@ -194,16 +314,15 @@ def draw_lines(hough, image, nlines, name, path=pathDim,
         except Exception:
             pass
 
-    cv2.imwrite(os.path.join(path, name+".png"), draw_im,
-                [cv2.IMWRITE_PNG_COMPRESSION, compression])
+    _debug_imwrite(os.path.join(path, name+".png"), draw_im, compression)
 
 
 def fit_minAreaRect(img, contoursMode, contoursMethod, minAreaRectMinLen,
                     lwTresh, debug):
     """
     Fits minimal area rectangles to the image. If no rectangles can be
-    fitted it returns False. Otherwise returns True and an image with drawn
-    rectangles.
+    fitted it returns False and None. Otherwise returns True and an image with
+    drawn rectangles.
 
     1. finds edges using canny edge detection algorithm
     2. finds all contours among the edges
@@ -213,7 +332,7 @@ def fit_minAreaRect(img, contoursMode, contoursMethod, minAreaRectMinLen,
         b. the ratio of longer vs, shorter rect. side is smaller than lwTresh
 
     5. if no rectangles satisfying sent conditions are found function returns
-    False and an empty (black) image
+    False and None, no image is allocated in that case
 
     For more details on the parameters see documentation.
 
@@ -232,7 +351,7 @@ def fit_minAreaRect(img, contoursMode, contoursMethod, minAreaRectMinLen,
         length, in pixels, of allowed shortest side to be fitted to contours
     """
     detection = False
-    box_img = np.zeros(img.shape, dtype=np.uint8)
+    box_img = None
     canny = cv2.Canny(img, 0, 255)
 
     # in in cv2.8something it was contours, hierarchy
@@ -245,27 +364,107 @@ def fit_minAreaRect(img, contoursMode, contoursMethod, minAreaRectMinLen,
         contours, hierarchy = cv2.findContours(canny, contoursMode,
                                                contoursMethod)
 
-    for cnt in contours:
-        rect = cv2.minAreaRect(cnt)
-        if (rect[1][0] > rect[1][1]):
-            length = rect[1][0]
-            width = rect[1][1]
-        else:
-            width = rect[1][0]
-            length = rect[1][1]
-        if (length > minAreaRectMinLen) and (width > minAreaRectMinLen):
-            if (length/width > lwTresh):
-                detection = True
-                box = cv2.boxPoints(rect)
-                box = np.asarray(box, dtype=np.int32)
-                cv2.fillPoly(box_img, [box], (255, 255, 255))
+    rects = [cv2.minAreaRect(cnt) for cnt in contours]
+    if not rects:
+        return detection, box_img
+
+    # rect is ((cx, cy), (w, h), angle); the side lengths of all rectangles
+    # are tested at once instead of unpacking each rectangle in Python. Since
+    # width is the shorter side, width > minAreaRectMinLen implies the same
+    # for the length and the ratio test can be done without a division.
+    sides = np.array([rect[1] for rect in rects])
+    length = sides.max(axis=1)
+    width = sides.min(axis=1)
+    passed = (width > minAreaRectMinLen) & (length > lwTresh*width)
+
+    # filling all polygons in one call would turn their overlaps into holes
+    for i in np.flatnonzero(passed):
+        if box_img is None:
+            box_img = np.zeros(img.shape, dtype=np.uint8)
+        detection = True
+        box = np.asarray(cv2.boxPoints(rects[i]), dtype=np.int32)
+        cv2.fillPoly(box_img, [box], (255, 255, 255))
 
     return detection, box_img
 
 
+def fit_houghLines(img, houghMethod, nlinesInSet, probabilisticHough=False,
+                   houghThreshold=20, minTheta=0, maxTheta=np.pi):
+    """Fits Hough lines to the image. Lines are returned in the same format
+    cv2.HoughLines returns them, an array of shape (N, 1, 2) of (rho, theta)
+    pairs, ordered from the most to the least voted for line. If no lines
+    were found returns None.
+
+    When probabilisticHough is True, the probabilistic Hough transform,
+    cv2.HoughLinesP, is used instead. It samples the edge pixels instead of
+    accumulating votes for all of them, which is considerably faster, but
+    returns line segments. Segments are converted to (rho, theta) pairs and
+    ordered by their length, which stands in for the number of votes. Only
+    nlinesInSet longest lines are returned in that case. The probabilistic
+    transform uses a 1 pixel distance resolution and houghThreshold as the
+    minimal number of votes a segment needs.
+
+    Only lines with angles between minTheta and maxTheta are returned. For
+    the standard transform the angles outside of that range are not swept at
+    all, which makes the transform proportionally cheaper.
+
+    Parameters
+    ----------
+    img : np.array
+        numpy array representing gray 8 bit 1 chanel image.
+    houghMethod : int
+        distance resolution, in pixels, of the Hough accumulator
+    nlinesInSet : int
+        number of most voted for lines that will be considered for colinearity
+        tests
+    probabilisticHough : bool
+        use the probabilistic Hough transform. Default: False.
+    houghThreshold : int
+        minimal number of votes a segment of the probabilistic Hough
+        transform needs. Default: 20
+    minTheta : float
+        minimal angle, in radians, of fitted lines. Default: 0
+    maxTheta : float
+        maximal angle, in radians, of fitted lines. Default: pi
+    """
+    if not probabilisticHough:
+        if use_cuda():
+            return _cuda_houghLines(img, houghMethod, minTheta, maxTheta)
+        return cv2.HoughLines(img, houghMethod, np.pi/180, 1, srn=0, stn=0,
+                              min_theta=minTheta, max_theta=maxTheta)
+
+    segments = cv2.HoughLinesP(img, 1, np.pi/180, houghThreshold)
+    if segments is None:
+        return None
+
+    x1, y1, x2, y2 = segments.reshape(-1, 4).astype(np.float64).T
+    dx, dy = x2 - x1, y2 - y1
+
+    # the normal of the segment, wrapped into the [0, pi) range HoughLines
+    # returns, in which case rho can be negative.
+    theta = np.arctan2(-dx, dy)
+    rho = x1*np.cos(theta) + y1*np.sin(theta)
+    wrap = theta < 0
+    theta[wrap] += np.pi
+    rho[wrap] *= -1
+    wrap = theta >= np.pi
+    theta[wrap] -= np.pi
+    rho[wrap] *= -1
+
+    inrange = np.flatnonzero((theta >= minTheta) & (theta <= maxTheta))
+    if len(inrange) == 0:
+        return None
+    length = dx[inrange]**2 + dy[inrange]**2
+    longest = inrange[np.argsort(length)[::-1][:nlinesInSet]]
+    lines = np.stack((rho[longest], theta[longest]), axis=-1)
+    return lines.reshape(-1, 1, 2).astype(np.float32)
+
+
 def dictify_hough(shape, houghVals):
-    """Function converts from hough line tuples (rho, theta) into a dictionary
-    of pixel coordinates on the image.
+    """Function converts from hough line tuples (rho, theta) into pixel
+    coordinates of line end points on the image. Returns a HoughLineXY named
+    tuple with x1, y1, x2 and y2 fields, see HoughLineXY._asdict if a
+    dictionary is needed.
 
     Parameters
     ----------
@@ -278,19 +477,22 @@ def dictify_hough(shape, houghVals):
     rho, theta = houghVals
     n_x, n_y = shape
 
-    x0 = np.cos(theta) * rho
-    y0 = np.sin(theta) * rho
-    x1 = int(x0 - (n_x + n_y) * np.sin(theta))
-    y1 = int(y0 + (n_x + n_y) * np.cos(theta))
-    x2 = int(x0 + (n_x + n_y) * np.sin(theta))
-    y2 = int(y0 - (n_x + n_y) * np.cos(theta))
+    sin, cos = math.sin(theta), math.cos(theta)
+    x0 = cos * rho
+    y0 = sin * rho
+    x1 = int(x0 - (n_x + n_y) * sin)
+    y1 = int(y0 + (n_x + n_y) * cos)
+    x2 = int(x0 + (n_x + n_y) * sin)
+    y2 = int(y0 - (n_x + n_y) * cos)
 
-    return {"x1": x1, "y1": y1, "x2": x2, "y2": y2}
+    return HoughLineXY(x1, y1, x2, y2)
 
 
 def process_field_bright(img, lwTresh, thetaTresh, dilateKernel, contoursMode,
                          contoursMethod, minAreaRectMinLen, houghMethod,
-                         nlinesInSet, lineSetTresh, dro, debug):
+                         nlinesInSet, lineSetTresh, dro, debug,
+                         probabilisticHough=False, houghThreshold=20,
+                         minTheta=0, maxTheta=np.pi):
     """
     Function detects bright trails in images. For parameters explanations see
     DetectTrails documentation for help.
@@ -338,37 +540,65 @@ def process_field_bright(img, lwTresh, thetaTresh, dilateKernel, contoursMode,
     dro : int
         treshold for maximal allowed distance between the average x-axis
         intersection coordinates of the two sets of lines
+    probabilisticHough : bool
+        use the probabilistic Hough transform to fit the lines, see
+        fit_houghLines. Default: False.
+    houghThreshold : int
+        minimal number of votes a line segment needs when the probabilistic
+        Hough transform is used. Default: 20
+    minTheta : float
+        minimal angle, in radians, of fitted Hough lines. Default: 0
+    maxTheta : float
+        maximal angle, in radians, of fitted Hough lines. Default: pi
     """
-    img[img < 0] = 0
+    # clamp negative values in a single pass, without a boolean mask, because
+    # convertScaleAbs would otherwise flip their sign
+    cv2.max(img, 0.0, dst=img)
 
     # FITS files are usually 1 channel 32 bit float images, we need
     # 1 channel 8 bit int images for OpenCV
-    gray_image = cv2.convertScaleAbs(img)
-    equ = cv2.equalizeHist(gray_image)
+    equ = cv2.convertScaleAbs(img)
 
-    if debug:
-        cv2.imwrite(os.path.join(pathBright, "1equBRIGHT.png"), equ,
-                    [cv2.IMWRITE_PNG_COMPRESSION, 3])
-        print("BRIGHT: saving EQU with removed stars")
+    if use_cuda() and not debug:
+        equ = _cuda_equalize_morph(equ, [(cv2.MORPH_DILATE, dilateKernel)])
+    else:
+        cv2.equalizeHist(equ, dst=equ)
 
-    equ = cv2.dilate(equ, dilateKernel)
+        if debug:
+            _debug_imwrite(os.path.join(pathBright, "1equBRIGHT.png"), equ, 3)
+            print("BRIGHT: saving EQU with removed stars")
 
-    if debug:
-        cv2.imwrite(os.path.join(pathBright, "2dilateBRIGHT.png"), equ,
-                    [cv2.IMWRITE_PNG_COMPRESSION, 3])
-        print("BRIGHT: saving dilated image.")
+        # morphological operations write into a scratch buffer which is then
+        # swapped with the image, this way no new images are allocated per step
+        scratch = np.empty_like(equ)
+        cv2.dilate(equ, dilateKernel, dst=scratch)
+        equ, scratch = scratch, equ
+
+        if debug:
+            _debug_imwrite(os.path.join(pathBright, "2dilateBRIGHT.png"), equ, 3)
+            print("BRIGHT: saving dilated image.")
 
     detection, box_img = fit_minAreaRect(equ, contoursMode, contoursMethod,
                                          minAreaRectMinLen, lwTresh, debug)
 
     if debug:
-        cv2.imwrite(os.path.join(pathBright, "3contoursBRIGHT.png"), box_img,
-                    [cv2.IMWRITE_PNG_COMPRESSION, 3])
+        contours = box_img if detection else np.zeros_like(equ)
+        _debug_imwrite(os.path.join(pathBright, "3contoursBRIGHT.png"), contours, 3)
         print("BRIGHT: saving contours")
 
     if detection:
-        equhough = cv2.HoughLines(equ, houghMethod, np.pi/180, 1)
-        boxhough = cv2.HoughLines(box_img, houghMethod, np.pi/180, 1)
+        equhough = fit_houghLines(equ, houghMethod, nlinesInSet,
+                                  probabilisticHough, houghThreshold,
+                                  minTheta, maxTheta)
+        boxhough = fit_houghLines(box_img, houghMethod, nlinesInSet,
+                                  probabilisticHough, houghThreshold,
+                                  minTheta, maxTheta)
+
+        # no lines were found, or none of them is between minTheta and maxTheta
+        if equhough is None or boxhough is None:
+            if debug:
+                print("BRIGHT: no Hough lines found")
+            return (False, None)
 
         if debug:
             draw_lines(equhough, equ, nlinesInSet, "5equhoughBRIGHT",
@@ -391,7 +621,8 @@ def process_field_bright(img, lwTresh, thetaTresh, dilateKernel, contoursMode,
 def process_field_dim(img, minFlux, addFlux, lwTresh, thetaTresh, erodeKernel,
                       dilateKernel, contoursMode, contoursMethod,
                       minAreaRectMinLen, houghMethod, nlinesInSet,
-                      dro, lineSetTresh, debug):
+                      dro, lineSetTresh, debug, probabilisticHough=False,
+                      houghThreshold=20, minTheta=0, maxTheta=np.pi):
     """
     Function detects dim trails in images. See DetectTrails documentation for
     more detailed explanation of parameters
@@ -449,44 +680,71 @@ def process_field_dim(img, minFlux, addFlux, lwTresh, thetaTresh, erodeKernel,
     dro : int
         treshold for maximal allowed distance between the average x-axis
         intersection coordinates of the two sets of lines
+    probabilisticHough : bool
+        use the probabilistic Hough transform to fit the lines, see
+        fit_houghLines. Default: False.
+    houghThreshold : int
+        minimal number of votes a line segment needs when the probabilistic
+        Hough transform is used. Default: 20
+    minTheta : float
+        minimal angle, in radians, of fitted Hough lines. Default: 0
+    maxTheta : float
+        maximal angle, in radians, of fitted Hough lines. Default: pi
     """
-    img[img < minFlux] = 0
-    img[img > 0] += addFlux
+    cv2.threshold(img, minFlux, 0, cv2.THRESH_TOZERO, dst=img)
+    np.add(img, addFlux, out=img, where=img > 0)
 
-    gray_image = cv2.convertScaleAbs(img)
-    equ = cv2.equalizeHist(gray_image)
+    equ = cv2.convertScaleAbs(img)
 
-    if debug:
-        print("DIM: saving EQU with stars removed")
-        cv2.imwrite(os.path.join(pathDim, "6equDIM.png"), equ,
-                    [cv2.IMWRITE_PNG_COMPRESSION, 0])
+    if use_cuda() and not debug:
+        equ = _cuda_equalize_morph(equ, [(cv2.MORPH_ERODE, erodeKernel),
+                                         (cv2.MORPH_DILATE, dilateKernel)])
+    else:
+        cv2.equalizeHist(equ, dst=equ)
+
+        if debug:
+            print("DIM: saving EQU with stars removed")
+            _debug_imwrite(os.path.join(pathDim, "6equDIM.png"), equ, 0)
 
-    opening = cv2.erode(equ, erodeKernel)
+        # erode and dilate write into a scratch buffer that is swapped with the
+        # image after each step, see process_field_bright
+        scratch = np.empty_like(equ)
+        cv2.erode(equ, erodeKernel, dst=scratch)
+        equ, scratch = scratch, equ
 
-    if debug:
-        print("DIM: saving eroded EQU with stars removed")
-        cv2.imwrite(os.path.join(pathDim, '7erodedDIM.png'), opening,
-                    [cv2.IMWRITE_PNG_COMPRESSION, 0])
+        if debug:
+            print("DIM: saving eroded EQU with stars removed")
+            _debug_imwrite(os.path.join(pathDim, '7erodedDIM.png'), equ, 0)
 
-    equ = cv2.dilate(opening, dilateKernel)
+        cv2.dilate(equ, dilateKernel, dst=scratch)
+        equ, scratch = scratch, equ
 
-    if debug:
-        print("DIM: saving dilated eroded EQU with stars removed")
-        cv2.imwrite(os.path.join(pathDim, '8openedDIM.png'), equ,
-                    [cv2.IMWRITE_PNG_COMPRESSION, 0])
+        if debug:
+            print("DIM: saving dilated eroded EQU with stars removed")
+            _debug_imwrite(os.path.join(pathDim, '8openedDIM.png'), equ, 0)
 
     detection, box_img = fit_minAreaRect(equ, contoursMode,
                                          contoursMethod,
                                          minAreaRectMinLen, lwTresh,
                                          debug)
     if debug:
-        cv2.imwrite(os.path.join(pathDim, "9contoursDIM.png"), box_img,
-                    [cv2.IMWRITE_PNG_COMPRESSION, 0])
+        contours = box_img if detection else np.zeros_like(equ)
+        _debug_imwrite(os.path.join(pathDim, "9contoursDIM.png"), contours, 0)
         print("DIM: saving contours")
 
     if detection:
-        equhough = cv2.HoughLines(equ, houghMethod, np.pi/180, 1)
-        boxhough = cv2.HoughLines(box_img, houghMethod, np.pi/180, 1)
+        equhough = fit_houghLines(equ, houghMethod, nlinesInSet,
+                                  probabilisticHough, houghThreshold,
+                                  minTheta, maxTheta)
+        boxhough = fit_houghLines(box_img, houghMethod, nlinesInSet,
+                                  probabilisticHough, houghThreshold,
+                                  minTheta, maxTheta)
+
+        # no lines were found, or none of them is between minTheta and maxTheta
+        if equhough is None or boxhough is None:
+            if debug:
+                print("DIM: FALSE AT NO HOUGH LINES FOUND!")
+            return (False, None)
 
         if debug:
             draw_lines(equhough, equ, nlinesInSet, "10equhoughDIM",
@@ -1,91 +1,68 @@
 """Removestars module contains all the required functionality to read a catalog
 source and blot out objects in the image. Currently only SDSS photoObj files
 are supported as a catalog source. Old code supporting CSV catalog sources was
-left as an example how its relatively simple to add a different catalog source.
+left, in the removestars_legacy module, as an example how its relatively simple
+to add a different catalog source.
 """
-import csv
-import math
+import os
+import functools
 
 import numpy as np
 import fitsio
 
-from .sdss import astrom
 from .sdss import files
 
 
-__all__ = ["read_photoObj", "remove_stars"]
+__all__ = ["read_photoObj", "remove_stars", "FILTER_IDX"]
 
 
-def CSV_read(path_to_CAS):
-    """ .. deprecated:: 1.0
-    Defines a function that reads CSV file given by path into a list of
-    dictionaries. Function is deprecated in favor of photoObjRead.
+FILTER_IDX = {'u': 0, 'g': 1, 'r': 2, 'i': 3, 'z': 4}
+"""Maps filter designations to the column index of that filter in the per
+filter arrays returned by read_photoObj."""
 
-    Returned list is arranged as
-        {[ra:, dec:, u:, g:, r:, i:, z:],
-            ...}.
 
-    """
-    labels = ['ra', 'de', 'u', 'g', 'r', 'i', 'z']
-    read = csv.DictReader(open(path_to_CAS), labels,
-                          delimiter=',', quotechar='"')
-    lines = list()
-    for line in read:
-        lines.append(line)
-    return lines
+PHOTOOBJ_COLUMNS = ["OBJC_TYPE", "TYPE", "ROWC", "COLC", "PETROTH90", "PSFMAG",
+                    "NOBSERVE", "NDETECT"]
+"""Columns of the photoObj table read by read_photoObj."""
 
 
-def remove_stars_CSV(img, _run, _camcol, _filter, _field):
-    """.. deprecated:: 1.0
-    Function that removes all stars found in coordinates file from a given
-    image. Requires the use of edited sdssFileTypes.par located in
-    detect_trails/sdss/share. Function was deprecated in favor of RemoveStars.
-
-    """
-    Coord = CSV_read(files.filename('CSVCoord', run=_run,
-                                    camcol=_camcol, field=_field))
-    Coord = Coord[1:]
-    conv = astrom.Astrom(run=_run, camcol=_camcol)
-
-    for star in Coord:
-        try:
-            if (float(star[_filter]) < 23):
-                ra = float(star['ra'])
-                de = float(star['de'])
-                xy = conv.eq2pix(_field, _filter, ra, de)
-                x, y = xy[0], xy[1]
-                img[x-30:x+30, y-30:y+30].fill(0.0)
-        except ValueError:
-            pass
-    return img
+def _ceil_int32(values):
+    """Rounds the values up and writes them directly into a new int32 array,
+    without materializing the rounded floats first."""
+    out = np.empty(values.shape, dtype=np.int32)
+    np.ceil(values, out=out, casting="unsafe")
+    return out
 
 
 def read_photoObj(path_to_photoOBJ):
-    """Function that reads photoObj headers and returns following lists:
+    """Function that reads photoObj headers and returns following arrays. Per
+    filter values are returned as 2D arrays with one row per object and one
+    column per filter, see FILTER_IDX for the column of each filter. Per
+    filter values are rounded up to the nearest integer.
 
    Returns
    -------
-   row : list(dict)
-       y coordinate of an object on the image. Each entry is a dictionary
-       where keys are the filter designations and values the coordinates
-   col : list(dict)
-       x coordinate of an object on the image. Each entry is a dictionary
-       where keys are the filter designations and values the coordinates
-   psfMag : list(dict)
-       Each entry is a dictionary where keys are the filter designations and
-       values the magnitudes. See:
+   row : np.array(int)
+       y coordinate of an object on the image, shape (N, 5).
+   col : np.array(int)
+       x coordinate of an object on the image, shape (N, 5).
+   psfMag : np.array(int)
+       PSF magnitude of an object, shape (N, 5). See:
        www.sdss3.org/dr10/algorithms/magnitudes.php#mag_psf
-   nObserve : list(int)
-       Number of times that object was imaged by SDSS.
-   objctype : list(int)
-       SDSS type identifier, see
-       cas.sdss.org/dr7/de/help/browser/enum.asp?n=ObjType
-   petro90 : list(dict)
+   petro90 : np.array(int)
        This is the radius, in arcsec, from the center of the object that
-       contains 90% of its Petrosian flux. Each entry is a dictionary where
-       keys are the filter designations and values the radii. See:
+       contains 90% of its Petrosian flux, shape (N, 5). See:
        www.sdss3.org/dr10/algorithms/magnitudes.php#mag_petro and
        data.sdss3.org/datamodel/files/BOSS_PHOTOOBJ/RERUN/RUN/CAMCOL/photoObj.html # noqa : W505
+   objctype : np.array(int)
+       SDSS type identifier, see
+       cas.sdss.org/dr7/de/help/browser/enum.asp?n=ObjType
+   types : np.array(int)
+       SDSS type identifier in each filter, shape (N, 5).
+   nObserve : np.array(int)
+       Number of times that object was imaged by SDSS.
+   nDetect : np.array(int)
+       Number of times that object was detected by SDSS.
 
    Parameters
    ----------
@@ -93,56 +70,66 @@ def read_photoObj(path_to_photoOBJ):
         string type system path to a photoObj*.fits file
 
     """
-    header1, header2 = fitsio.read(path_to_photoOBJ, header="True")
+    # photoObj tables have hundreds of columns, only the used ones are read
+    with fitsio.FITS(path_to_photoOBJ) as photoObj:
+        header1 = photoObj[1].read(columns=PHOTOOBJ_COLUMNS)
     objctype = header1['OBJC_TYPE']
     types = header1['TYPE']
-    rows = header1['ROWC']
-    cols = header1['COLC']
-    petro90s = header1['PETROTH90']
-    psfMags = header1['PSFMAG']
     nObserve = header1["NOBSERVE"]
     nDetect = header1["NDETECT"]
 
     # names of fits field names ending with an f ("final") are returned
-    rowf = list()
-    colf = list()
-    petro90f = list()
-    psfMagf = list()
-    for i in range(0, len(rows)):
-        row = rows[i]
-        rowf.append({'u': math.ceil(row[0]), 'g': math.ceil(row[1]),
-                     'r': math.ceil(row[2]), 'i': math.ceil(row[3]),
-                     'z': math.ceil(row[4])})
-
-        col = cols[i]
-        colf.append({'u': math.ceil(col[0]), 'g': math.ceil(col[1]),
-                     'r': math.ceil(col[2]), 'i': math.ceil(col[3]),
-                     'z': math.ceil(col[4])})
-
-        psfMag = psfMags[i]
-        psfMagf.append({'u': math.ceil(psfMag[0]), 'g': math.ceil(psfMag[1]),
-                        'r': math.ceil(psfMag[2]), 'i': math.ceil(psfMag[3]),
-                        'z': math.ceil(psfMag[4])})
-
-        petro90 = petro90s[i]
-        petro90f.append({'u': math.ceil(petro90[0]), 'g': math.ceil(petro90[1]),
-                         'r': math.ceil(petro90[2]), 'i': math.ceil(petro90[3]),
-                         'z': math.ceil(petro90[4])})
+    rowf = _ceil_int32(header1['ROWC'])
+    colf = _ceil_int32(header1['COLC'])
+    psfMagf = _ceil_int32(header1['PSFMAG'])
+    petro90f = _ceil_int32(header1['PETROTH90'])
 
     return rowf, colf, psfMagf, petro90f, objctype, types, nObserve, nDetect
 
 
-def fill(array, tuple_val):
-    """.. deprecated:: 1.0
-    Used to colorize the image for debugging purposes.
+@functools.lru_cache(maxsize=8)
+def _read_photoObj_cached(path_to_photoOBJ):
+    """Reads a photoObj file, see read_photoObj, and caches the results. All
+    filters of a field share the same photoObj file so this saves re-reading
+    it when the filters are processed one after the other. Returned arrays
+    are shared between calls and are therefore made read-only.
+
+    Parameters
+    ----------
+    path_to_photoOBJ : str
+        absolute system path to a photoObj*.fits file
     """
-    if np.shape(array)[-1] != len(tuple_val):
-        raise ValueError("Tuple len is not the same as array element len")
+    photoObj = read_photoObj(path_to_photoOBJ)
+    for arr in photoObj:
+        arr.flags.writeable = False
+    return photoObj
+
 
-    for i in range(len(array)):
-        for j in range(len(array[i])):
-            array[i, j] = tuple_val
-    return array
+def _count_magdiffs(psfMag, maxmagdiff, chunksize=4096):
+    """Counts, for each object, the number of filter pairs whose magnitudes
+    differ by more than maxmagdiff. Pairs are visited one at a time so that
+    only arrays with one element per object are ever allocated. Objects are
+    processed in chunks, so that for large catalogs the chunk and all of its
+    temporaries stay in cache while all the pairs are compared.
+
+    Parameters
+    ----------
+    psfMag : np.array
+        (N, 5) array of magnitudes, see read_photoObj
+    maxmagdiff : float
+        maximal allowed difference between two magnitudes.
+    chunksize : int
+        number of objects processed at a time. Default: 4096
+    """
+    nbad = np.zeros(len(psfMag), dtype=np.int32)
+    nfilters = psfMag.shape[1]
+    for start in range(0, len(psfMag), chunksize):
+        mags = psfMag[start:start+chunksize]
+        counts = nbad[start:start+chunksize]
+        for j in range(nfilters):
+            for k in range(j+1, nfilters):
+                counts += np.abs(mags[:, j] - mags[:, k]) > maxmagdiff
+    return nbad
 
 
 def remove_stars(img, _run, _camcol, _filter, _field, defaultxy, filter_caps,
@@ -154,7 +141,8 @@ def remove_stars(img, _run, _camcol, _filter, _field, defaultxy, filter_caps,
     magnitude. The square is up/down-scaled by a scaling factor converting the
     object size from arcsec to pixel size. If the calculated radius is less
     than zero or bigger than maximal allowed size, a default square size is
-    used.
+    used. Squares of objects near the image edge are clipped to the image and
+    squares completely outside of it are skipped.
 
     Aditionally to determining size of the blocked out square, function tries
     to discriminate actual sources from false ones.
@@ -205,29 +193,41 @@ def remove_stars(img, _run, _camcol, _filter, _field, defaultxy, filter_caps,
         maximal allowed difference between two magnitudes.
 
     """
+    photoObjPath = files.filename("photoObj", run=_run, camcol=_camcol,
+                                  field=_field)
     rows, cols, psfMag, petro90, objctype, types, nObserve, nDetect = \
-        read_photoObj(files.filename("photoObj", run=_run, camcol=_camcol,
-                                     field=_field))
-
-    for i in range(len(rows)):
-        x = int(cols[i][_filter])
-        y = int(rows[i][_filter])
-
-        if psfMag[i] and psfMag[i][_filter] < filter_caps[_filter]:
-            diffs = []
-            a = [val for key, val in psfMag[i].items()]
-            for j in range(len(a)):
-                for k in range(j+1, len(a)):
-                    diffs.append(a[j]-a[k])
-            diffs = np.absolute(diffs)
-
-            if magcount >= np.count_nonzero(diffs > maxmagdiff):
-                dxy = defaultxy
-                if petro90[i][_filter] > 0:
-                    dxy = int(petro90[i][_filter]/pixscale) + 10
-                if dxy > maxxy:
-                    dxy = defaultxy
-                if nObserve[i] == nDetect[i]:
-                    img[x-dxy:x+dxy, y-dxy:y+dxy].fill(0.0)
+        _read_photoObj_cached(os.path.abspath(photoObjPath))
+
+    fi = FILTER_IDX[_filter]
+
+    # All objects are tested at once, only the objects that pass all of the
+    # tests are visited in Python to blot them out. Pairwise magnitude
+    # differences are the most expensive test so they are only counted for
+    # the objects that passed the cheaper tests.
+    keep = (nObserve == nDetect) & (psfMag[:, fi] < filter_caps[_filter])
+    nbad = _count_magdiffs(psfMag[keep], maxmagdiff)
+    keep[keep] = nbad <= magcount
+
+    # square sizes are determined by the Petrosian radius when one exists
+    # and is not too large, and are only computed for the kept objects
+    petro = petro90[keep, fi]
+    dxys = (petro/pixscale).astype(np.int32) + 10
+    dxys = np.where((petro <= 0) | (dxys > maxxy), defaultxy, dxys)
+
+    # square bounds are computed for all objects at once and handed to the
+    # loop as Python ints, so that no numpy scalars are created per object.
+    # Squares that fall completely outside of the image are dropped and the
+    # rest are clipped to the image, negative bounds would otherwise wrap
+    # around and blot out the wrong part of the image.
+    x, y = cols[keep, fi], rows[keep, fi]
+    nx, ny = img.shape
+    inside = ((x+dxys > 0) & (x-dxys < nx) & (y+dxys > 0) & (y-dxys < ny))
+    x, y, dxys = x[inside], y[inside], dxys[inside]
+    bounds = zip(np.maximum(x-dxys, 0).tolist(),
+                 np.minimum(x+dxys, nx).tolist(),
+                 np.maximum(y-dxys, 0).tolist(),
+                 np.minimum(y+dxys, ny).tolist())
+    for xmin, xmax, ymin, ymax in bounds:
+        img[xmin:xmax, ymin:ymax] = 0.0
 
     return img
@@ -0,0 +1,80 @@
+"""Deprecated removestars functionality. Contains the old code supporting CSV
+catalog sources, kept as an example how to add a different catalog source, and
+debugging helpers. None of it is used by detecttrails and it is kept out of
+the removestars module so that it is only loaded when explicitly imported.
+"""
+import csv
+
+import numpy as np
+
+from .sdss import astrom
+from .sdss import files
+
+
+__all__ = ["CSV_read", "remove_stars_CSV", "fill"]
+
+
+def _csv_float(value):
+    """Converts a CSV string value to float, returning NaN for values that
+    can not be converted instead of raising a ValueError."""
+    try:
+        return float(value)
+    except ValueError:
+        return np.nan
+
+
+def CSV_read(path_to_CAS):
+    """ .. deprecated:: 1.0
+    Defines a function that reads CSV file given by path into a dictionary of
+    columns. Function is deprecated in favor of photoObjRead.
+
+    Returned dictionary is arranged as
+        {ra: np.array, dec: np.array, u: np.array, g: np.array, ...}.
+
+    Values that can not be converted to floats are set to NaN.
+    """
+    labels = ['ra', 'de', 'u', 'g', 'r', 'i', 'z']
+    with open(path_to_CAS) as csvfile:
+        lines = list(csv.reader(csvfile, delimiter=',', quotechar='"'))
+
+    n = len(lines)
+    columns = dict()
+    for i, label in enumerate(labels):
+        values = (line[i] if i < len(line) else "" for line in lines)
+        columns[label] = np.fromiter(map(_csv_float, values),
+                                     dtype=np.float64, count=n)
+    return columns
+
+
+def remove_stars_CSV(img, _run, _camcol, _filter, _field):
+    """.. deprecated:: 1.0
+    Function that removes all stars found in coordinates file from a given
+    image. Requires the use of edited sdssFileTypes.par located in
+    detect_trails/sdss/share. Function was deprecated in favor of RemoveStars.
+
+    """
+    Coord = CSV_read(files.filename('CSVCoord', run=_run,
+                                    camcol=_camcol, field=_field))
+    conv = astrom.Astrom(run=_run, camcol=_camcol)
+
+    # first line is the header, NaNs mark values that could not be read and
+    # comparisons with NaN are False so such objects are skipped
+    ras, des, mags = Coord['ra'][1:], Coord['de'][1:], Coord[_filter][1:]
+    valid = (mags < 23) & np.isfinite(ras) & np.isfinite(des)
+    for ra, de in zip(ras[valid], des[valid]):
+        xy = conv.eq2pix(_field, _filter, ra, de)
+        x, y = xy[0], xy[1]
+        img[x-30:x+30, y-30:y+30].fill(0.0)
+    return img
+
+
+def fill(array, tuple_val):
+    """.. deprecated:: 1.0
+    Used to colorize the image for debugging purposes.
+    """
+    if np.shape(array)[-1] != len(tuple_val):
+        raise ValueError("Tuple len is not the same as array element len")
+
+    # the tuple is broadcast over all but the last axis
+    array[...] = tuple_val
+    return array
@@ -76,6 +76,11 @@ def get_photoid(*args, **keys):
         old: If true, use the older set of exponents.  These
         old exponents were chosen poorly and should not be used
         for new ids.
+        bits: If true, pack the id info with bit shifts instead of
+        powers of ten.  The ids can then no longer be read off by
+        eye, but are much faster to create and extract.  16 bits are
+        used for run, 11 for rerun, 3 for camcol, 12 for field and 16
+        for id, the same ranges used by get_objid.
 
     Outputs:
         A super id combining all the id info into a single 64-bit
@@ -103,11 +108,10 @@ def get_photoid(*args, **keys):
 
     if nargs == 1:
         arg1 = args[0]
-        if hasattr(arg1, 'dtype'):
+        if isinstance(arg1, (numpy.ndarray, numpy.void)):
             # see if this has the fields, if so call sphotoid
-            names = arg1.dtype.names
-            if names is not None:
-                return sphotoid(arg1)
+            if arg1.dtype.names is not None:
+                return sphotoid(arg1, **keys)
             else:
                 photoid_usage()
         else:
@@ -121,31 +125,67 @@ def get_photoid(*args, **keys):
     # 1 for camcol
     # 4 for field
     # 4 for id
-    old = keys.get('old',False)
-    if not old:
-        pvals = [13,9,8,4,0]
-    else:
-        pvals = [15,12,11,6,0]
+    pows = _photoid_pows[bool(keys.get('old',False))]
     if nargs > 5:
         nargs=5
 
     is_scalar = _is_scalar(args[0])
 
-    # make ten an array scalar with exactly 64 bits
-    ten = numpy.array(10, dtype='i8')
+    if keys.get('bits',False):
+        return _get_photoid_bits(args[:nargs], is_scalar)
+
+    # scalar ids are combined as python ints, without any arrays
+    if is_scalar:
+        return sum(int(args[i])*pows[i] for i in range(nargs))
+
+    # the scaled ids are accumulated through a single scratch buffer so no
+    # temporaries are allocated per id. Powers of ten are python ints, they
+    # are exact and are cast to 64 bits by the multiplication.
     superid = None
     for i in range(nargs):
-        arg = numpy.array(args[i], dtype='i8', copy=False, ndmin=1)
+        arg = numpy.atleast_1d(numpy.asarray(args[i], dtype='i8'))
 
         if superid is None:
             superid = numpy.zeros(arg.size,dtype='i8')
+            scaled = numpy.empty_like(superid)
+
+        numpy.multiply(arg, pows[i], out=scaled)
+        superid += scaled
 
-        p = pvals[i]
+    return superid
+
+# powers of ten run,rerun,camcol,field,id are scaled by in decimal photoids,
+# keyed by the old keyword, see get_photoid
+_photoid_pows = {False: (10**13, 10**9, 10**8, 10**4, 1),
+                 True: (10**15, 10**12, 10**11, 10**6, 1)}
+# powers of ten spanned by rerun,camcol,field,id
+_photoid_spans = {old: tuple(p[i]//p[i+1] for i in range(4))
+                  for old, p in _photoid_pows.items()}
 
-        superid += arg*ten**p
+# shifts and masks of run,rerun,camcol,field,id in bit packed photoids
+_photoid_shifts = [42,31,28,16,0]
+_photoid_masks = [0xFFFF,0x7FF,0x7,0xFFF,0xFFFF]
 
+def _get_photoid_bits(args, is_scalar):
+    """
+    Pack run,rerun,camcol,field,id into a superid using bit shifts,
+    see get_photoid(bits=True)
+    """
     if is_scalar:
-        superid = superid[0]
+        superid = 0
+        for arg, shift in zip(args, _photoid_shifts):
+            superid |= int(arg) << shift
+        return superid
+
+    superid = None
+    for arg, shift in zip(args, _photoid_shifts):
+        arg = numpy.atleast_1d(numpy.asarray(arg, dtype='i8'))
+
+        if superid is None:
+            superid = numpy.zeros(arg.size,dtype='i8')
+
+        superid |= arg << shift
+
     return superid
 
 def photoid(*args, **keys):
@@ -155,7 +195,7 @@ def photoid(*args, **keys):
     return get_photoid(*args,**keys)
 
 
-def sphotoid(arr, old=False):
+def sphotoid(arr, old=False, bits=False):
     """
     This just extracts id info from an array with fields.  There is not
     need to call this directly since photoid will call sphotoid if needed.
@@ -163,6 +203,7 @@ def sphotoid(arr, old=False):
     names = arr.dtype.names
     if names is None:
         raise ValueError("array must have fields")
+    names = frozenset(names)
 
     args = []
 
@@ -182,9 +223,9 @@ def sphotoid(arr, old=False):
     if len(args) == 0:
         raise ValueError("the struct must contain at least 'run'")
     args = tuple(args)
-    return photoid( *args, old=old )
+    return photoid( *args, old=old, bits=bits )
 
-def photoid_extract(photoid, as_tuple=False, old=False):
+def photoid_extract(photoid, as_tuple=False, old=False, bits=False):
     """
 
     Extract run,rerun,camcol,field,id from a photoid 
@@ -202,36 +243,41 @@ def photoid_extract(photoid, as_tuple=False, old=False):
         of a dictionary
     old: bool, optional
         Assum the old version of exponents were used.
+    bits: bool, optional
+        The photoid was created with get_photoid(bits=True).
     """
-    if not old:
-        pvals = [13,9,8,4,0]
-    else:
-        pvals = [15,12,11,6,0]
-
-    # make ten an array scalar with exactly 64 bits
-    ten = numpy.array(10, dtype='i8')
-
-    run = photoid/ten**pvals[0]
-
-    rerun = photoid/ten**pvals[1] - run*ten**(pvals[0]-pvals[1])
-
-    camcol = \
-        photoid/ten**pvals[2] - \
-        run*ten**(pvals[0]-pvals[2]) - \
-        rerun*ten**(pvals[1]-pvals[2])
-
-    field = \
-        photoid/ten**pvals[3] - \
-        run*ten**(pvals[0]-pvals[3]) - \
-        rerun*ten**(pvals[1]-pvals[3]) - \
-        camcol*ten**(pvals[2]-pvals[3])
-
-    id =  \
-        photoid/ten**pvals[4] - \
-        run*ten**(pvals[0]-pvals[4]) - \
-        rerun*ten**(pvals[1]-pvals[4]) - \
-        camcol*ten**(pvals[2]-pvals[4]) - \
-        field*ten**(pvals[3]-pvals[4])
+    # all ids are extracted straight into their preallocated output arrays,
+    # no temporaries are made along the way
+    is_scalar = _is_scalar(photoid)
+    photoid = numpy.atleast_1d(numpy.asarray(photoid, dtype='i8'))
+    ids = [numpy.empty_like(photoid) for i in range(5)]
+
+    if bits:
+        for out, shift, mask in zip(ids, _photoid_shifts, _photoid_masks):
+            numpy.right_shift(photoid, shift, out=out)
+            out &= mask
+        if is_scalar:
+            ids = [out[0] for out in ids]
+        run,rerun,camcol,field,id = ids
+        if as_tuple:
+            return run,rerun,camcol,field,id
+        else:
+            return {'run':run,'rerun':rerun,
+                    'camcol':camcol,'field':field,
+                    'id':id}
+
+    spans = _photoid_spans[bool(old)]
+
+    # peel off the ids starting from the least significant one, each step is
+    # a single divmod by the power of ten spanned by the id. The quotient is
+    # kept in the run array, which holds the run once all ids are peeled off
+    run = ids[0]
+    run[:] = photoid
+    for out, span in zip(ids[:0:-1], spans[::-1]):
+        numpy.divmod(run, span, out=(run, out))
+    if is_scalar:
+        ids = [out[0] for out in ids]
+    run,rerun,camcol,field,id = ids
 
     if as_tuple:
         return run,rerun,camcol,field,id
@@ -281,14 +327,13 @@ def get_objid(*args, **keys):
     skyversion=keys.get('skyversion',2)
     if nargs == 1:
         arg1 = args[0]
-        #if isinstance(arg1, numpy.ndarray):
-
-        if hasattr(arg1, 'dtype'):
-            if arg1.dtype.names is not None:
-                if 'run' in arg1.dtype.names:
+        if isinstance(arg1, (numpy.ndarray, numpy.void)):
+            names = arg1.dtype.names
+            if names is not None:
+                if 'run' in names:
                     return objid(arg1['run'],arg1['rerun'],arg1['camcol'],
                                  arg1['field'],arg1['id'], skyversion=skyversion)
-                elif 'RUN' in arg1.dtype.names:
+                elif 'RUN' in names:
                     return objid(arg1['RUN'],arg1['RERUN'],arg1['CAMCOL'],
                                  arg1['FIELD'],arg1['ID'], skyversion=skyversion)
                 else:
@@ -301,41 +346,66 @@ def get_objid(*args, **keys):
     elif nargs != 5:
         objid_usage()
 
-    run,rerun,camcol,field,id = args
+    skyversion = int(skyversion)
 
-    dt = 'i8'
-    sky    = numpy.array(skyversion, ndmin=1, dtype=dt, copy=False)
-    run    = numpy.array(run, ndmin=1, dtype=dt, copy=False)
-    rerun  = numpy.array(rerun, ndmin=1, dtype=dt, copy=False)
-    camcol = numpy.array(camcol, ndmin=1, dtype=dt, copy=False)
-    field  = numpy.array(field, ndmin=1, dtype=dt, copy=False)
-    id     = numpy.array(id, ndmin=1, dtype=dt, copy=False)
+    # scalar ids are validated and packed as python ints, without any arrays
+    if is_scalar:
+        ids = [int(arg) for arg in args]
+        _validate_objid_scalar(skyversion, *ids)
+        run,rerun,camcol,field,id = ids
+        return ((skyversion << 59) | (rerun << 48) | (run << 32) |
+                (camcol << 29) | (field << 16) | id)
+
+    # int64 arrays, i.e. catalog columns, are used as they are
+    if all(isinstance(arg, numpy.ndarray) and arg.dtype == numpy.int64
+           and arg.ndim > 0 for arg in args):
+        ids = args
+    else:
+        ids = [numpy.atleast_1d(numpy.asarray(arg, dtype='i8'))
+               for arg in args]
 
+    _validate_objid(skyversion, *ids)
+    return _get_objid_fast(*ids, skyversion=skyversion)
 
-    wbad, = where(  (sky < 0)     | (sky >= 16) 
-                  | (rerun < 0)   | (rerun >= 2**11)
-                  | (run < 0)     | (run >= 2**16)
-                  | (camcol < 1)  | (camcol > 6) 
-                  | (field < 0)   | (field >= 2**12) 
-                  | (id < 0)      | (id >= 2**16) )
+# allowed ranges of run,rerun,camcol,field,id in objids
+_objid_bounds = [(0,2**16-1), (0,2**11-1), (1,6), (0,2**12-1), (0,2**16-1)]
 
-    if wbad.size > 0:
+def _validate_objid(skyversion, *ids):
+    """
+    Raise a ValueError if any of the run,rerun,camcol,field,id objid inputs
+    are out of bounds. Each bound is checked with a single min/max reduction,
+    checks stop at the first id out of bounds.
+    """
+    if skyversion < 0 or skyversion >= 16:
         raise ValueError("inputs out of bounds")
+    for arr, (lo, hi) in zip(ids, _objid_bounds):
+        if arr.size > 0 and (arr.min() < lo or arr.max() > hi):
+            raise ValueError("inputs out of bounds")
 
-    superid = numpy.zeros(run.size, dtype=dt)
-
-    first_field = numpy.zeros(run.size, dtype=dt)
-    superid = (superid
-               | (sky << 59)
-               | (rerun << 48)
-               | (run << 32)
-               | (camcol << 29)
-               | (first_field << 28)
-               | (field << 16)
-               | (id << 0) )
+def _validate_objid_scalar(skyversion, *ids):
+    """
+    Same as _validate_objid but for python int inputs.
+    """
+    if skyversion < 0 or skyversion >= 16:
+        raise ValueError("inputs out of bounds")
+    for val, (lo, hi) in zip(ids, _objid_bounds):
+        if val < lo or val > hi:
+            raise ValueError("inputs out of bounds")
 
-    if is_scalar:
-        superid = superid[0]
+def _get_objid_fast(run, rerun, camcol, field, id, skyversion=2):
+    """
+    Pack run,rerun,camcol,field,id int64 arrays into objids. Inputs are not
+    validated, see _validate_objid.
+    """
+    # the shifted ids are ORed into the superid through a single scratch
+    # buffer. first_field, bit 28, is always zero and is left unset.
+    shape = numpy.broadcast(run,rerun,camcol,field,id).shape
+    superid = numpy.full(shape, skyversion << 59, dtype='i8')
+    shifted = numpy.empty_like(superid)
+    for arr, shift in ((rerun,48), (run,32), (camcol,29), (field,16)):
+        numpy.left_shift(arr, shift, out=shifted)
+        superid |= shifted
+    superid |= id
     return superid
 
 def objid(*args, **keys):
@@ -369,7 +439,7 @@ def objid_extract(obj_id, full=False):
             'first_field':first_field,
             'sky_version':sky_version}
 
-def nmgy2mag(nmgy, ivar=None):
+def nmgy2mag(nmgy, ivar=None, copy=True, out=None):
     """
     Name:
         nmgy2mag
@@ -381,12 +451,19 @@ def nmgy2mag(nmgy, ivar=None):
     Calling Sequence:
         mag = nmgy2mag(nmgy)
         mag,err = nmgy2mag(nmgy, ivar=ivar)
+        mag = nmgy2mag(nmgy, copy=False, out=mag)
     Inputs:
         nmgy: SDSS nanomaggies.  The return value will have the same
             shape as this array.
     Keywords:
         ivar: The inverse variance.  Must have the same shape as nmgy.
             If ivar is sent, then a tuple (mag,err) is returned.
+        copy: If False, nmgy is clipped in place instead of clipping a
+            copy of it, nmgy must then be a writeable float array.
+            Default True.
+        out: An array, of the same shape as nmgy, into which the
+            magnitudes are written.  Useful to reuse the same output
+            buffer over many calls.
 
     Outputs:
         The magnitudes.  If ivar= is sent, then a tuple (mag,err)
@@ -399,10 +476,15 @@ def nmgy2mag(nmgy, ivar=None):
     """
     nmgy = numpy.array(nmgy, ndmin=1, copy=False)
 
-    nmgy_clip = numpy.clip(nmgy,0.001,1.e11)
+    if copy:
+        nmgy_clip = numpy.clip(nmgy,0.001,1.e11)
+    else:
+        nmgy_clip = numpy.clip(nmgy,0.001,1.e11,out=nmgy)
 
-    mag = nmgy_clip.copy()
-    mag[:] = 22.5-2.5*log10(nmgy_clip)
+    # 22.5-2.5*log10(nmgy) computed in place in a single array
+    mag = log10(nmgy_clip, out=out)
+    mag *= -2.5
+    mag += 22.5
 
     if ivar is not None:
 
@@ -410,8 +492,7 @@ def nmgy2mag(nmgy, ivar=None):
         if ivar.shape != nmgy.shape:
             raise ValueError("ivar must be same shape as input nmgy array")
 
-        err = mag.copy()
-        err[:] = 9999.0
+        err = numpy.full(mag.shape, 9999.0, dtype=mag.dtype)
 
         w=where( ivar > 0 )
 
@@ -444,8 +525,7 @@ def mag2nmgy(mag, magerr=None):
 
     nmgy = 10.0**( (22.5-mag)/2.5 )
     if magerr is not None:
-        ivar = nmgy.copy()
-        ivar[:] = 0.0
+        ivar = numpy.zeros_like(nmgy)
 
         w = numpy.where( (nmgy > 0) & (magerr > 0) )
 
@@ -480,13 +560,8 @@ def nmgy2lups(nmgy, ivar=None, band=None):
         is returned (lup,luperr)
     """
     s = nmgy.shape
-    if ivar is not None:
-        sivar = ivar.shape
-        if len(sivar) != len(s):
-            raise ValueError("ivar and fluxes must be same shape")
-        for i in xrange(len(s)):
-            if sivar[i] != s[i]:
-                raise ValueError("ivar and fluxes must be same shape")
+    if ivar is not None and ivar.shape != s:
+        raise ValueError("ivar and fluxes must be same shape")
 
     if len(s) == 2:
         if s[1] != 5:
@@ -508,21 +583,18 @@ def nmgy2lups(nmgy, ivar=None, band=None):
         if b not in [0,1,2,3,4]:
             raise ValueError("band must be in [0,4]")
 
-    lups = numpy.array( nmgy, copy=True )
-    lups[:] = -9999.0
-    if ivar is not None:
-        lups_err = numpy.array(ivar, copy=True)
-        lups_err[:] = -9999.0
+    if nband == 1:
+        b = band[0]
+    else:
+        # all bands in a single pass, the band constants broadcast over
+        # the (nobj,5) array
+        b = slice(None)
 
-    for b in band:
-        if nband == 1:
-            lups[:] = _nmgy2lups_1band(nmgy, b)
-            if ivar is not None:
-                lups_err[:] = _ivar2luperr_1band(nmgy, ivar, b)
-        else:
-            lups[:,b] = _nmgy2lups_1band(nmgy[:,b], b)
-            if ivar is not None:
-                lups_err[:,b] = _ivar2luperr_1band(nmgy[:,b], ivar[:,b], b)
+    # the kernels fill every element, results are only cast back to the
+    # input types
+    lups = _nmgy2lups_1band(nmgy, b).astype(nmgy.dtype, copy=False)
+    if ivar is not None:
+        lups_err = _ivar2luperr_1band(nmgy, ivar, b).astype(ivar.dtype, copy=False)
 
     if ivar is not None:
         return lups, lups_err
@@ -551,13 +623,8 @@ def lups2nmgy(lups, err=None, band=None):
          as well as (nmgy,ivar)
     """
     s = lups.shape
-    if err is not None:
-        serr = err.shape
-        if len(serr) != len(s):
-            raise ValueError("err and lups must be same shape")
-        for i in xrange(len(s)):
-            if serr[i] != s[i]:
-                raise ValueError("err and lups must be same shape")
+    if err is not None and err.shape != s:
+        raise ValueError("err and lups must be same shape")
 
     if len(s) == 2:
         if s[1] != 5:
@@ -579,21 +646,18 @@ def lups2nmgy(lups, err=None, band=None):
         if b not in [0,1,2,3,4]:
             raise ValueError("band must be in [0,4]")
 
-    nmgy = numpy.array( lups, copy=True )
-    nmgy[:] = -9999.0
-    if err is not None:
-        ivar = numpy.array(err, copy=True)
-        ivar[:] = -9999.0
+    if nband == 1:
+        b = band[0]
+    else:
+        # all bands in a single pass, the band constants broadcast over
+        # the (nobj,5) array
+        b = slice(None)
 
-    for b in band:
-        if nband == 1:
-            nmgy[:] = _lups2nmgy_1band(lups, b)
-            if err is not None:
-                ivar[:] = _luperr2ivar_1band(lups, err, b)
-        else:
-            nmgy[:,b] = _lups2nmgy_1band(lups[:,b], b)
-            if err is not None:
-                ivar[:,b] = _luperr2ivar_1band(lups[:,b], err[:,b], b)
+    # the kernels fill every element, results are only cast back to the
+    # input types
+    nmgy = _lups2nmgy_1band(lups, b).astype(lups.dtype, copy=False)
+    if err is not None:
+        ivar = _luperr2ivar_1band(lups, err, b).astype(err.dtype, copy=False)
 
     if err is not None:
         return nmgy, ivar
@@ -604,32 +668,62 @@ _bvalues=[1.4, 0.9, 1.2, 1.8, 7.4]
 _log10 = numpy.log(10.0)
 
 ln10_min10 = -23.02585
+
+# constants used by the per band conversions, computed once per band
+_2p5_over_log10 = 2.5/_log10
+_log10_over_2p5 = _log10/2.5
+_0p4_log10 = 0.4*_log10
+# as arrays, so that indexing them with slice(None) gives the constants of
+# all bands at once, broadcasting against (nobj,5) arrays
+_5_over_b = 5.0/numpy.array(_bvalues)
+_b_over_5 = numpy.array(_bvalues)/5.0
+_lups_zero = 2.5*(10.0-numpy.log10(_bvalues))
+_nmgy_zero = ln10_min10+numpy.log(_bvalues)
+_luperr_scale = 2.5/(0.2*numpy.array(_bvalues)*_log10)
+
+# The per band conversions below are evaluated in place, in a single output
+# array, instead of allocating a new temporary for every operation. The band
+# is either a single band index or slice(None) to convert all five bands of
+# a (nobj,5) array in one pass.
 def _nmgy2lups_1band(nmgy, band):
-    b=_bvalues[band]
-    lups = 2.5*(10.0-numpy.log10(b)) - 2.5*numpy.arcsinh(5.0*nmgy/b)/_log10
+    lups = numpy.multiply(nmgy, _5_over_b[band])
+    numpy.arcsinh(lups, out=lups)
+    lups *= -_2p5_over_log10
+    lups += _lups_zero[band]
     return lups
 
 def _ivar2luperr_1band(nmgy, ivar, band):
-    b=_bvalues[band]
-    lups_err = numpy.array(ivar, copy=True)
-    lups_err[:] = -9999.0
-    w,=numpy.where(ivar > 0.0)
-    if w.size > 0:
-        terr = 1.0/numpy.sqrt(ivar[w])
-        lups_err[w] = 2.5*terr
-        lups_err[w] /= 0.2*b*_log10*numpy.sqrt(1.0 + (5.0*nmgy[w]/b)**2 )
+    lups_err = numpy.full_like(ivar, -9999.0)
+    w = ivar > 0.0
+    if w.any():
+        # 2.5*err / (0.2*b*ln(10)*sqrt(1 + (5*nmgy/b)**2))
+        # band constants are broadcast to the full shape before masking
+        scale = numpy.broadcast_to(_5_over_b[band], ivar.shape)[w]
+        denom = numpy.multiply(nmgy[w], scale)
+        denom *= denom
+        denom += 1.0
+        numpy.sqrt(denom, out=denom)
+        denom *= numpy.sqrt(ivar[w])
+        scale = numpy.broadcast_to(_luperr_scale[band], ivar.shape)[w]
+        lups_err[w] = scale/denom
     return lups_err
 
 def _lups2nmgy_1band(lups, band):
-    b=_bvalues[band]
-    nmgy= b/5.*numpy.sinh(-lups*numpy.log(10.)/2.5-ln10_min10-numpy.log(b))
+    nmgy = numpy.multiply(lups, -_log10_over_2p5)
+    nmgy -= _nmgy_zero[band]
+    numpy.sinh(nmgy, out=nmgy)
+    nmgy *= _b_over_5[band]
     return nmgy
 
 def _luperr2ivar_1band(lups, err, band):
-    b=_bvalues[band]
-    df= b/5.*numpy.cosh(-lups*numpy.log(10.)/2.5-ln10_min10-numpy.log(b))\
-        *err*numpy.log(10.)/2.5
-    return 1./df**2.
+    df = numpy.multiply(lups, -_log10_over_2p5)
+    df -= _nmgy_zero[band]
+    numpy.cosh(df, out=df)
+    df *= err
+    df *= _b_over_5[band]*_log10_over_2p5
+    df *= df
+    numpy.divide(1., df, out=df)
+    return df
 
 def make_cmodelflux(objs, doivar=True):
     """
@@ -665,42 +759,26 @@ def make_cmodelflux(objs, doivar=True):
     devflux_ivar = objs['devflux_ivar']
     expflux_ivar = objs['expflux_ivar']
 
-    # get same shape, type
-    flux = objs['devflux'].copy()
-    ivar = objs['devflux'].copy()
-    flux[:] = -9999.0
-    ivar[:] = 0.0
-
-    for band in [0,1,2,3,4]:
-        bflux, bivar = _make_cmodelflux_1band(fracdev[:,band],
-                                              devflux[:,band],
-                                              devflux_ivar[:,band],
-                                              expflux[:,band],
-                                              expflux_ivar[:,band])
-        flux[:,band] = bflux
-        ivar[:,band] = bivar
-
-    return flux, ivar
+    # all bands are combined at once, the arrays are [Nobj,5]
+    return _make_cmodelflux_bands(fracdev, devflux, devflux_ivar,
+                                  expflux, expflux_ivar)
 
-def _make_cmodelflux_1band(fracdev, dev, dev_ivar, exp, exp_ivar):
+def _make_cmodelflux_bands(fracdev, dev, dev_ivar, exp, exp_ivar):
     fracexp = 1.0-fracdev
 
     flux = dev*fracdev + exp*fracexp
 
-    ivar = exp.copy()
-    ivar[:] = 0.0
+    ivar = numpy.zeros(flux.shape, dtype=dev.dtype)
 
-    w,=where( (exp_ivar > 0) & (dev_ivar > 0) )
-    if w.size > 0:
-        # measurements are correlated... doing a weighted average
-        err2 = fracdev[w]/dev_ivar[w] + fracexp[w]/exp_ivar[w]
+    w = (exp_ivar > 0) & (dev_ivar > 0)
+    # measurements are correlated... doing a weighted average
+    err2 = fracdev[w]/dev_ivar[w] + fracexp[w]/exp_ivar[w]
 
-        w2, = where( err2 > 0)
-        if w2.size > 0:
-            w=w[w2]
-            ivar[w] = 1.0/err2[w2]
+    w2 = err2 > 0
+    w[w] = w2
+    ivar[w] = 1.0/err2[w2]
 
-    return flux,ivar
+    return flux.astype(dev.dtype, copy=False),ivar
 
 def make_cmodelmag(objs, doerr=True, dered=False, lups=False):
     """
@@ -754,14 +832,15 @@ def dered_fluxes(extinction, flux, ivar=None):
     """
     Adam says this is more accurate at the faint end.
     """
-    exponent = 0.4*extinction
-    flux_correct = (10.0**exponent)*flux
+    # 10**(0.4*ext) as exp(0.4*ln(10)*ext), the ivar correction
+    # 10**(-0.8*ext) is just the inverse square of the flux correction
+    flux_scale = numpy.exp(extinction*_0p4_log10)
+    flux_correct = flux_scale*flux
 
     if ivar is None:
         return flux_correct
     else:
-        exponent = -0.8*extinction
-        ivar_correct = (10.0**exponent)*ivar
+        ivar_correct = ivar/(flux_scale*flux_scale)
 
         return flux_correct, ivar_correct
 
@@ -779,18 +858,17 @@ def sdss_wrap(ra):
     Take all points with ra > 300 and put them at negative ra.
     This makes it easier to plot up ra and dec in the SDSS
     """
-    ranew = numpy.array(ra, dtype='f8', copy=True, ndmin=1)
-    w,=numpy.where(ra > 300)
-    if w.size > 0:
-        ranew[w] = ra[w]-360.0
-
-    return ranew
+    ra = numpy.atleast_1d(numpy.asarray(ra, dtype='f8'))
+    return numpy.where(ra > 300, ra-360.0, ra)
 
 
 
 def get_id_info(**keys):
     """
     Get id info based on a wide variety of possible inputs
+
+    When a catalog with many rows is sent as cat=, the ids of all the rows
+    are returned as arrays.
     """
     import copy
     from . import files
@@ -799,14 +877,12 @@ def get_id_info(**keys):
 
     cat=keys.get('cat',None)
     if cat is not None:
-        if len(cat['run'].shape)==0:
-            tcat=cat
-        else:
-            tcat=cat[0]
+        # ids of all rows are made at once, objid and photoid take the
+        # whole catalog
         for k in ['run','rerun','camcol','field','id']:
-            out[k] = tcat[k]
-        out['objid'] = objid(tcat)
-        out['photoid'] = photoid(tcat)
+            out[k] = cat[k]
+        out['objid'] = objid(cat)
+        out['photoid'] = photoid(cat)
     elif 'objid' in keys:
         # for the title
         ids=util.objid_extract(keys['objid'])
@@ -850,8 +926,4 @@ def get_id_info(**keys):
     return out
 
 def _is_scalar(obj):
-    try:
-        l=len(obj)
-        return False
-    except:
-        return True
+    return numpy.ndim(obj) == 0
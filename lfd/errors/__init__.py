@@ -2,6 +2,6 @@ import sys
 
 #try:
     #import errors
-from errors import QsubErr, DetectTrailsLogs, Errors #Errors
+from errors import QsubErr, QsubEntry, DetectTrailsLogs, Errors #Errors
 #except: sys.stderr.write("Errors module was not loaded\n.")
 
@@ -1,12 +1,36 @@
 import os
 import re
 import csv
+import mmap
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
 
 import createjobs
 
 
+# qsub error file names, i.e. startrun-endrun.eJOBID
+_QSUB_FNAME_RE = re.compile(r"^\d+-\d+\.e\d+$")
+# a detecttrails log entry, from its run,camcol,field,filter line up to the
+# start of the next entry. The whole message following the first line and
+# the 9th line of the entry, the error code, are captured as well. None of
+# the lines up to the error code can start the next entry, entries shorter
+# than 9 lines are kept with an empty error code. Logs are memory mapped, so
+# the pattern matches bytes.
+_LOG_START = rb"[0-9]*,[123456],[0-9]*,[ugriz]"
+_LOG_LINE = rb"\n(?!" + _LOG_START + rb")"
+_LOG_ENTRY_RE = re.compile(
+    rb"([0-9]*),([123456]),([0-9]*),([ugriz])"
+    rb"((?:(?:" + _LOG_LINE + rb"[^\n]*){7}" + _LOG_LINE + rb"([^\n]*))?.*?)"
+    rb"(?=" + _LOG_START + rb")",
+    re.DOTALL
+)
+
+QsubEntry = namedtuple("QsubEntry", ["runid", "jobid", "err", "bot", "top"])
+"""A qsub error: run range ("startrun-endrun") and id of the job, the error
+and the start and end run of the job as ints."""
+
 
 class QsubErr:
     """
@@ -22,13 +46,14 @@ class QsubErr:
 
       methods
     -----------
-    errexists(filename, jobid):
-        returns True or False. Noerror state is defined if only
+    errExists(entry):
+        returns True or False for a os.DirEntry of a qsub file.
+        Noerror state is defined if only
         self.noerrors is found in a *-*.e* qsub file.
     getall():
-        returns a list( dict() ) or all the errors. Each dict()
-        contains RunID ("startrun-endrun"), JobID and the error (Err)
-        in question.
+        returns a list of QsubEntry of all the errors. Each entry
+        contains the runid ("startrun-endrun"), jobid and the error (err)
+        in question, as well as the start and end run as ints (bot, top).
     """
 
     def __init__(self, path):
@@ -38,37 +63,44 @@ class QsubErr:
         self.errors = self.read()
 
 
-    def errExists(self, filename):
-        path = os.path.join(self.path, filename)
-        if (os.path.getsize(path) != self.noerror):
+    def errExists(self, entry):
+        if (entry.stat().st_size != self.noerror):
             return True
         return False
 
-    def getError(self, filename, jobid):
-        file = open(os.path.join(self.path, filename))
+    def getError(self, entry, jobid):
         noerror = ["/var/spool/torque/mom_priv/jobs/JOBID.fermi.SC[49]: .[5]: .[44]: shopt: not found [No such file or directory]",
                    "/var/spool/torque/mom_priv/jobs/JOBID.fermi.SC[49]: .[5]: .[63]: [: argument expected"]
-        noerror1 = noerror[0].replace("JOBID", str(jobid))
-        noerror2 = noerror[1].replace("JOBID", str(jobid))
-        #print (noerror1, noerror2)
-        #print(self.noerror)
-        for line in file.readlines():
-            errline = ""
-            if line.strip() not in (noerror1, noerror2):
-                errline += line.strip()
-        return errline
+        noerror = frozenset(line.replace("JOBID", str(jobid))
+                            for line in noerror)
+        # file is streamed line by line, all non-empty lines that aren't one
+        # of the known harmless messages are joined once at the end
+        with open(entry.path) as file:
+            lines = (line.strip() for line in file)
+            return "\n".join(line for line in lines
+                             if line and line not in noerror)
+
+    def _readFile(self, entry):
+        runid, jobid = entry.name.split(".")
+        jobid = jobid[1:]
+        if(self.errExists(entry)):
+            # run range is parsed here once, so the users don't have to
+            bot, top = runid.split("-")
+            return QsubEntry(runid, jobid, self.getError(entry, jobid),
+                             int(bot), int(top))
+        return None
 
     def read(self):
-        p = re.compile("\d*-\d*.e\d*")
-        errors = list( dict() )
-        for filename in os.listdir(self.path):
-            if(p.match(filename)):
-                runid = filename.split(".")[0]
-                jobid = filename.split(".")[1][1:]
-                if(self.errExists(filename)):
-                    errors.append({"RunID":runid,
-                                   "Err":self.getError(filename, jobid),
-                                   "JobID":jobid})
+        # scandir entries carry their path and cache their stat
+        with os.scandir(self.path) as entries:
+            entries = [entry for entry in entries
+                       if _QSUB_FNAME_RE.match(entry.name)]
+
+        # reading is I/O bound, files are stat-ed and read in threads
+        nworkers = min(32, (os.cpu_count() or 1)*4)
+        with ThreadPoolExecutor(max_workers=nworkers) as executor:
+            errors = executor.map(self._readFile, entries)
+            errors = [err for err in errors if err is not None]
         return errors
 
 
@@ -78,50 +110,57 @@ class QsubErr:
 
 
 
-def parse_log_entry(log_entry):
-    alllines = log_entry.split("\n")
-    run, camcol, field, filter = alllines[0].split(",")
-    error = log_entry[len(alllines[0]):]
-    err_code = alllines[8] 
-    return run, camcol, filter, field, error, err_code
-
-
 class DetectTrailsLogs(object):
 
     etype = np.dtype([
-        ('run', np.int),
-        ('camcol', np.int),
-        ("filter", np.str, 1),
-        ("field", np.int),
-        ("error", np.str, 1000),
-        ("err_code", np.str, 200)
+        ('run', "i4"),
+        ('camcol', "i1"),
+        ("filter", "U1"),
+        ("field", "i4"),
+        ("error", "U1000"),
+        ("err_code", "U200")
     ])
 
     def __init__(self, path, errors):
         self.path = path
         self.errors = np.array(errors, dtype=DetectTrailsLogs.etype)
 
+    # etype fields in the order they are captured by _LOG_ENTRY_RE, text is
+    # kept as bytes until it's decoded into etype
+    _parsetype = np.dtype([
+        ('run', "i4"),
+        ('camcol', "i1"),
+        ("field", "i4"),
+        ("filter", "S1"),
+        ("error", "S1000"),
+        ("err_code", "S200")
+    ])
+
     @classmethod
     def fromFile(cls, file_path):
         fpath = file_path
-        errors = []
-
-        pattern = re.compile("[0-9]*,[123456],[0-9]*,[ugriz]")
-        alltxt = open(file_path).read()
-
-        matches = re.finditer(pattern, alltxt)
-        starts = [m.start() for m in matches]
-
-        #si - indice where log starts, ei indice of where a lof ends
-        for si, ei in zip(starts, starts[1:]):
-            (run, camcol, filter,
-             field, error, err_code) = parse_log_entry(alltxt[si:ei])
-            errors.append((
-                int(run), int(camcol),
-                filter,  int(field),
-                error, err_code
-            ))
 
+        # the log is memory mapped instead of read into a string and all
+        # entries are matched on the mapped bytes directly. The last entry
+        # in the file is not followed by another and is not read. Files
+        # without a single comma can not contain an entry and are not
+        # scanned at all, empty files can not be mapped.
+        entries = []
+        with open(file_path, "rb") as file:
+            if os.fstat(file.fileno()).st_size > 0:
+                with mmap.mmap(file.fileno(), 0,
+                               access=mmap.ACCESS_READ) as alltxt:
+                    if alltxt.find(b",") != -1:
+                        entries = _LOG_ENTRY_RE.findall(alltxt)
+        parsed = np.array(entries, dtype=cls._parsetype)
+
+        errors = np.empty(parsed.shape, dtype=cls.etype)
+        for name in cls.etype.names:
+            if parsed.dtype[name].kind == "S":
+                errors[name] = np.char.decode(parsed[name], "utf-8",
+                                              "replace")
+            else:
+                errors[name] = parsed[name]
 
         return cls(fpath, errors=errors)
 
@@ -133,10 +172,14 @@ class DetectTrailsLogs(object):
             #self.errors["field"]
         )[::-1])
 
-        for run, camcol, filter, field, error, errc in self.errors[sortedind]:
-            print("{0:<5d}{1:<3d}{2:<3}{3:<10d}{4}".format(run, camcol,
-                                                           filter, field,
-                                                           errc[:80]))
+        # the rows are formatted first and then printed out all at once
+        lines = ["{0:<5d}{1:<3d}{2:<3}{3:<10d}{4}".format(run, camcol,
+                                                          filter, field,
+                                                          errc[:80])
+                 for run, camcol, filter, field, error, errc
+                 in self.errors[sortedind].tolist()]
+        if lines:
+            print("\n".join(lines))
 
 
 
@@ -176,40 +219,51 @@ class Errors:
     """
 
     def __init__(self, qsubErrpath, dettrailsErrpath):
-        self.qsub = QsubErr(qsubErrpath).errors
-        self.dettrails = DetectTrailsLogs(dettrailsErrpath).errors
+        # qsub errors and detecttrails logs are independent, they are read
+        # concurrently so that their disk reads overlap
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            qsub = executor.submit(QsubErr, qsubErrpath)
+            dettrails = executor.submit(DetectTrailsLogs.fromFile,
+                                        dettrailsErrpath)
+            self.qsub = qsub.result().errors
+            self.dettrails = dettrails.result().errors
 
     def toFile(self, filepath):
-        file = open(filepath, "w")
+        # detecttrails errors are sorted by run once, errors of runs covered
+        # by a qsub job are then found by bisecting the sorted runs
+        order = np.argsort(self.dettrails["run"], kind="mergesort")
+        dettrails = self.dettrails[order]
+        runs = dettrails["run"]
+
+        # all lines are formatted first and written out at once
+        lines = []
         for qerr in self.qsub:
-            bot = int(qerr["RunID"].split("-")[0])
-            top = int(qerr["RunID"].split("-")[1])
-            #print(bot, top, int(logs[0]["Run"]))
-            file.writelines(qerr["RunID"]+" "+qerr["JobID"]+" "+qerr["Err"]+"\n")
-            for lerr in self.dettrails:
-                if (bot <= int(lerr["Run"]) and top>=int(lerr["Run"])):
-                    file.writelines(("    {} {} {} {} {}\n").format(lerr["Run"], lerr["camcol"],
-                                                        lerr["filter"], lerr["field"], lerr["Err"]))
-        file.close()
-
-    def _removeDuplicates(self, runs, fun=None):
-        seen = set()
-        return [ x for x in runs if not (x in seen or seen.add(x))]
+            lines.append(qerr.runid+" "+qerr.jobid+" "+qerr.err+"\n")
+            lo = np.searchsorted(runs, qerr.bot, side="left")
+            hi = np.searchsorted(runs, qerr.top, side="right")
+            for lerr in dettrails[lo:hi]:
+                lines.append(("    {} {} {} {} {}\n").format(lerr["run"], lerr["camcol"],
+                                                  lerr["filter"], lerr["field"], lerr["error"]))
+
+        with open(filepath, "w") as file:
+            file.writelines(lines)
+
+    def _removeDuplicates(self, runs):
+        # dict keys are unique and keep the insertion order
+        return list(dict.fromkeys(runs))
 
     def _genRunsQsub(self):
-        runs = list()
+        # run ranges of all jobs are expanded as arrays and made unique, and
+        # sorted, at once
+        runs = [np.zeros(0, dtype=int)]
         for qerr in self.qsub:
-            top = int(qerr["RunID"].split("-")[1])
-            bot = int(qerr["RunID"].split("-")[0])
-            if (top!=bot):  runs.extend([x for x in range(bot, top)])
-            else: runs.append(bot)
-        return runs
+            bot, top = qerr.bot, qerr.top
+            if (top!=bot):  runs.append(np.arange(bot, top))
+            else: runs.append(np.array([bot]))
+        return np.unique(np.concatenate(runs)).tolist()
 
     def _genRunsDT(self):
-        allerr = list()
-        for lerr in self.dettrails:
-            allerr.append(lerr["Run"])
-        runs = self._removeDuplicates(allerr)
+        runs = self._removeDuplicates(self.dettrails["run"].tolist())
         return runs
 
     def genJobsQsub(self, kwargs=None):
@@ -222,13 +276,5 @@ class Errors:
         self.jobs.create()
 
     def __len__(self):
-        curframe = inspect.currentframe()
-        calframe = inspect.getouterframes(curframe, context=15)
-        for i in range(5):
-            print("    caller: ",calframe[i][3])
-        len1 = len(self.qsub)
-        print("Number of failed QSUB jobs: ", len1)
-        len2 = len(self.dettrails)
-        print("Number of failed frames (DetTrails errors): ", len2)
-        print("Total errors occured QSUB+DetTrails = ")
-        return len1+len2
+        """Total number of errors, failed qsub jobs and failed frames."""
+        return len(self.qsub) + len(self.dettrails)
@@ -15,6 +15,11 @@ class BottomRight(ttk.Frame):
         self.pack(side=tk.TOP, fill=tk.BOTH, expand=1)
         self.parent = parent
         self.data = parent.data
+        # bound once, the next/previous callbacks run on every (repeated)
+        # keypress and skip the attribute lookups through the parents
+        self._getNext = self.data.getNext
+        self._getPrevious = self.data.getPrevious
+        self._update = parent.root.update
 
         self.style = ttk.Style()
         self.style.configure("False.TButton", background="tomato2")
@@ -45,20 +50,20 @@ class BottomRight(ttk.Frame):
         """Callback function that moves the current data index to the following
         one and updates the whole GUI.
         """
-        self.data.getNext()
-        self.parent.root.update()
+        self._getNext()
+        self._update()
 
     def previmg(self, *args):
         """Callback function that moves to the previous data instance and
         updates the whole GUI.
         """
-        self.data.getPrevious()
-        self.parent.root.update()
+        self._getPrevious()
+        self._update()
 
     def true(self, *args):
         """Callback that sets the false_positive attribute of the current Event
-        to False, persists the change to the DB, moves the current data index
-        to the following data instance and updates the whole GUI.
+        to False, commits the change, moves the current data index to the
+        following data instance and updates the whole GUI.
         """
         self.data.event.false_positive = False
         self.data.events.commit()
@@ -66,8 +71,8 @@ class BottomRight(ttk.Frame):
 
     def false(self, *args):
         """Callback that sets the false_positive attribute of the current Event
-        to True, persists the change to the DB, moves the current data index to
-        the following data instance and updates the whole GUI.
+        to True, commits the change, moves the current data index to the
+        following data instance and updates the whole GUI.
         """
         self.data.event.false_positive = True
         self.data.events.commit()
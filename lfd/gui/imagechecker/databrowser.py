@@ -66,25 +66,50 @@ class Browser(metaclass=GenericBrowser):
         self.secondaryIndexer = None if secondaryIndexer is None else secondaryIndexer
         self.__primary = None
         self.__secondary = None
+        # frame identifiers the secondary was last queried for
+        self.__secondaryKey = None
+
+    def __getSecondary(self, run, camcol, filter, field):
+        """Query the secondary indexer for the given frame, unless it was
+        already queried for the very same frame. Browsing through many
+        primary items on the same frame then does not query the database
+        each time.
+        """
+        key = (run, camcol, filter, field)
+        if key != self.__secondaryKey:
+            self.__secondary.get(run=run, camcol=camcol, filter=filter,
+                                 field=field)
+            self.__secondaryKey = key
 
     def _initPrimary(self, URI):
         """Instantiate the primary indexer."""
+        if self.__primary is not None:
+            self.__primary.close()
         self.__primary = self.primaryIndexer(URI)
         run = self.__primary.item.run
         camcol = self.__primary.item.camcol
         filter = self.__primary.item.filter
         field = self.__primary.item.field
         if self.__secondary is not None:
-            self.__secondary.get(run, camcol, filter, field)
+            self.__getSecondary(run, camcol, filter, field)
 
     def _initSecondary(self, URI):
         """Instantiate the secondary indexer."""
+        if self.__secondary is not None:
+            self.__secondary.close()
         self.__secondary = self.secondaryIndexer(URI)
+        self.__secondaryKey = None
         run = self.__primary.item.run
         camcol = self.__primary.item.camcol
         filter = self.__primary.item.filter
         field = self.__primary.item.field
-        self.__secondary.get(run, camcol, filter, field)
+        self.__getSecondary(run, camcol, filter, field)
+
+    def close(self):
+        """Close the database sessions held by the indexers."""
+        for indexer in (self.__primary, self.__secondary):
+            if indexer is not None:
+                indexer.close()
 
     def getNext(self):
         """Advance the index of the primary by a step and then find if the
@@ -93,8 +118,7 @@ class Browser(metaclass=GenericBrowser):
         if self.__primary is not None:
             self.__primary.next()
             tmp = self._primary.item
-            self.__secondary.get(run=tmp.run, camcol=tmp.camcol, filter=tmp.filter,
-                                 field=tmp.field)
+            self.__getSecondary(tmp.run, tmp.camcol, tmp.filter, tmp.field)
 
     def getPrevious(self):
         """Regress the index of the primary by a step and then find if the
@@ -103,8 +127,7 @@ class Browser(metaclass=GenericBrowser):
         if self.__primary is not None:
             self.__primary.previous()
             tmp = self._primary.item
-            self.__secondary.get(run=tmp.run, camcol=tmp.camcol, filter=tmp.filter,
-                                 field=tmp.field)
+            self.__getSecondary(tmp.run, tmp.camcol, tmp.filter, tmp.field)
 
     def get(self, run, camcol, filter, field, which=0):
         """Given frame specifiers (run, camcol, filter, field) select and
@@ -114,7 +137,7 @@ class Browser(metaclass=GenericBrowser):
         """
         self.__primary.get(run=run, camcol=camcol, filter=filter, field=field,
                            which=which)
-        self.__secondary.get(run=run, camcol=camcol, filter=filter, field=field)
+        self.__getSecondary(run, camcol, filter, field)
 
     @property
     def _primary(self):
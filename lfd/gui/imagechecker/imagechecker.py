@@ -26,15 +26,20 @@ class ImageChecker(Tk):
     * <Left> - move to previous image without saving any changes
     * <Right> - continue to the next image without saving any changes
     * <Up> - continue to the next image but set the verified and false positive
-      flags of the current Event to True and False respectively. Persist the
-      changes to the DB
+      flags of the current Event to True and False respectively and commit
+      the changes
     * <Down> - continue to the next image but set the verified and false
       positive flags of the current Event to True and True respectively and
-      persist the change to the DB
+      commit the changes
     * <LMB> - when clicked on the image will move the first point of the linear
-      feature to that location and persist the changes to the database
+      feature to that location, committed with the Event on <Up> or <Down>
     * <RMB> - when clicked on the image will move the second point of the
-      linear feature to that location and persist the changes to the database
+      linear feature to that location, committed with the Event on <Up> or
+      <Down>
+
+    Committed changes are buffered and written to the DB together, once
+    `commitsize` Events were committed or when the App is closed, see
+    `EventIndexer.flush`.
 
     The colors in the data table on the right frame indicate the following:
 
@@ -77,6 +82,7 @@ class ImageChecker(Tk):
         self.bind('<Right>', self.rightFrame.bottomRight.nextimg)
         self.bind("<Up>", self.rightFrame.bottomRight.true)
         self.bind("<Down>", self.rightFrame.bottomRight.false)
+        self.protocol("WM_DELETE_WINDOW", self.close)
 
         self.initGUI()
 
@@ -126,6 +132,11 @@ class ImageChecker(Tk):
         self.rightFrame.update()
         self.leftFrame.update()
 
+    def close(self):
+        """Close the database sessions and destroy the app."""
+        self.data.close()
+        self.destroy()
+
     def failedUpdate(self):
         """Redraw left and right Frames and display their failure screens."""
         self.rightFrame.failedEventLoadScreen()
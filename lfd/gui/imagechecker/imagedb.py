@@ -30,6 +30,14 @@ def connect2db(uri="sqlite:///"+path.join(path.expanduser("~"), "Desktop/foo.db"
     # map to existing or create new tables in the DB
     Base.metadata.create_all(engine)
 
+    # images are looked up by their frame identifiers, tables created before
+    # the index was declared do not have it yet
+    existing = sql.inspect(engine).get_indexes("images")
+    existing = [index["name"] for index in existing]
+    for index in Image.__table__.indexes:
+        if index.name not in existing:
+            index.create(engine)
+
     # create a Session object so transactions can be made
     Session = sessionmaker(bind=engine)
 
@@ -64,6 +72,8 @@ class Image(Base):
     imgpath - path to the image corresponding to the frame identifiers
     """
     __tablename__ = "images"
+    __table_args__ = (sql.Index("ix_images_frame", "run", "camcol", "filter",
+                                "field"), )
     run = sql.Column(sql.Integer)
     camcol = sql.Column(sql.Integer)
     filter = sql.Column(sql.String(length=1))
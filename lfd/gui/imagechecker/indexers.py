@@ -2,6 +2,11 @@
 PNG images and matching events in the events database.
 """
 
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from sqlalchemy import bindparam, select
+from sqlalchemy.orm import joinedload
 
 from lfd import results as res
 from lfd.results import Event
@@ -10,6 +15,32 @@ from lfd.gui.imagechecker import imagedb
 from lfd.gui.imagechecker.imagedb import Image
 
 
+# single item lookups are made on every step through the items. Their select
+# statements are built only once, with bound parameters, SQLAlchemy caches
+# their compiled form and they are re-executed with new parameters after.
+
+def _itemIdQuery(table):
+    """Returns a statement selecting the row of the table with the id given
+    by the `itemid` parameter.
+    """
+    return select(table).where(table.id == bindparam("itemid"))
+
+
+def _frameIdQuery(table):
+    """Returns a statement selecting the row of the table with the frame
+    identifiers given by the `run`, `camcol`, `filter` and `field` parameters.
+    Rows are ordered by their ids and the first `which` of them are skipped.
+    """
+    return (select(table)
+            .where(table.run == bindparam("run"),
+                   table.filter == bindparam("filter"),
+                   table.camcol == bindparam("camcol"),
+                   table.field == bindparam("field"))
+            .order_by(table.id)
+            .limit(1)
+            .offset(bindparam("which")))
+
+
 class Indexer:
     """Generic indexer of items in a database. Given a list of items or a
     database connection, session and table will produce an order-maintained
@@ -33,18 +64,37 @@ class Indexer:
       row of the DB
     item : object
       currently selected dynamically loaded from the DB as an object
+    chunksize : int
+      number of items loaded from the DB at once when browsing
 
     """
+    chunksize = 200
+    # long-lived read-only session, see initFromDB and _readScope
+    _session = None
+    # a single background thread that loads the chunks of items neighbouring
+    # the current one while the user is still looking at it, see _prefetch
+    _prefetcher = None
+
     def __init__(self, items=None):
         self.item = None
         self.items = [None]
         self.current = None
+        # loaded chunks of items, keyed by the index they start at, each
+        # chunk is a dict of items keyed by their ids, see _getCached
+        self._chunks = {}
+        # start of, and the future loading, the chunk being prefetched
+        self._prefetchStart = None
+        self._prefetched = None
+        self._prefetcher = ThreadPoolExecutor(max_workers=1)
 
         if items is not None:
             self.items = items
             self.current = 0
 
-        self.maxindex = len(self.items)
+        # index of each item id in the items list
+        self._positions = {itemid: i for i, itemid in enumerate(self.items)}
+
+        self.maxindex = len(self.items) - 1
         # loads the first item into self.item, if possible
         self.get()
 
@@ -53,21 +103,38 @@ class Indexer:
         raise NotImplementedError(("The implementations needs to be defined "
                                    "by a specific child class."))
 
+    def close(self):
+        """Stops prefetching and closes the session used to read items from
+        the database."""
+        if self._prefetcher is not None:
+            self._dropPrefetch()
+            self._prefetcher.shutdown(wait=True)
+            self._prefetcher = None
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    @contextmanager
+    def _readScope(self):
+        """Provides the long-lived session of the indexer for reading single
+        items. Read objects are expunged and the transaction is rolled back
+        once done, so that the next read sees the current state of the
+        database. Sessions can not be shared between threads so chunks of
+        items, which can be loaded in the background, use their own sessions.
+        """
+        try:
+            yield self._session
+        finally:
+            self._session.expunge_all()
+            self._session.rollback()
+
     def __step(self, step):
         """Makes a positive (forward) or negative (backwards) step in the list
         of items and loads the newly pointed to object.
 
         """
-        if self.current is None:
-            self.current = None
-        else:
-            dummyindex = self.current + step
-            if dummyindex > self.maxindex:
-                self.current = self.maxindex
-            elif dummyindex < 0:
-                self.current = 0
-            else:  # 0 < dummyindex < self.maxindex:
-                self.current = dummyindex
+        if self.current is not None:
+            self.current = max(0, min(self.maxindex, self.current + step))
             self.get()
 
     def next(self):
@@ -80,12 +147,11 @@ class Indexer:
 
     def skip(self, steps):
         """Skips 'steps' number of steps. Value of 'steps' can be positive or
-        negative indicating forward or backward skip respectively.
+        negative indicating forward or backward skip respectively. Skips past
+        the first or the last item stop at them.
 
         """
-        tmpnext = self.current + steps
-        if 0 <= tmpnext and tmpnext <= self.maxindex:
-            self.__step(steps)
+        self.__step(steps)
 
     def goto(self, index=None, itemid=None):
         """If an 'index' is provided jumps to the given index. If 'itemid' is
@@ -97,7 +163,7 @@ class Indexer:
         if index is not None:
             steps = index-self.current
         if itemid is not None:
-            index = self.items.index(itemid)
+            index = self._positions[itemid]
             steps = index-self.current
         self.skip(steps)
 
@@ -119,6 +185,74 @@ class Indexer:
         raise NotImplementedError(("Implementation needs to be defined by a "
                                    "specific child class."))
 
+    def _getFromItemIds(self, *args, **kwargs):
+        """Given a list of unique object ids queries the database for the
+        rows and returns them as a list of appropriate objects. The returned
+        objects are expunged from the database session.
+
+        """
+        raise NotImplementedError(("Implementation needs to be defined by a "
+                                   "specific child class."))
+
+    def _getCached(self, itemid):
+        """Returns the object with the given unique id. On a cache miss the
+        chunk of items containing the wanted one is loaded from the database
+        in a single query and cached instead, so browsing through the items
+        in order queries the database only once every `chunksize` items.
+        Only the chunk of the wanted item and its neighbouring chunks are
+        kept.
+
+        """
+        index = self._positions.get(itemid, None)
+        if index is None:
+            return self._getFromItemId(itemid)
+
+        start = index - index % self.chunksize
+        if itemid not in self._chunks.get(start, {}):
+            if start == self._prefetchStart:
+                self._chunks[start] = self._prefetched.result()
+            else:
+                self._chunks[start] = self._loadChunk(start)
+            self._dropPrefetch()
+
+        for key in [key for key in self._chunks
+                    if abs(key - start) > self.chunksize]:
+            del self._chunks[key]
+
+        return self._chunks[start].get(itemid, None)
+
+    def _loadChunk(self, start):
+        """Loads the chunk of items starting at the given index from the
+        database and returns them as a dictionary keyed by their ids.
+        """
+        chunk = self._getFromItemIds(self.items[start:start+self.chunksize])
+        return {item.id: item for item in chunk}
+
+    def _dropPrefetch(self):
+        """Forgets the chunk being prefetched, cancelling it if its loading
+        has not started yet.
+        """
+        if self._prefetched is not None:
+            self._prefetched.cancel()
+        self._prefetchStart = None
+        self._prefetched = None
+
+    def _prefetch(self):
+        """If the chunk of the next, or the previous, item is not cached
+        starts loading it in the background. The database is then queried
+        while the user is looking at the current item and the step into the
+        next chunk does not have to wait on it.
+        """
+        for index in (self.current+1, self.current-1):
+            start = index - index % self.chunksize
+            if 0 <= index < len(self.items) and start not in self._chunks:
+                if start != self._prefetchStart:
+                    self._dropPrefetch()
+                    self._prefetchStart = start
+                    self._prefetched = self._prefetcher.submit(
+                        self._loadChunk, start)
+                break
+
     def get(self, run=None, camcol=None, filter=None, field=None, which=0,
             itemid=None):
         """If nothing is provided, jumps to the current index and loads the db
@@ -149,12 +283,13 @@ class Indexer:
           unique id of the desired item
 
         """
-        if all([run, camcol, filter, field]):
+        if (run is not None and camcol is not None and filter is not None
+                and field is not None):
             item = self._getFromFrameId(run, camcol, filter, field, which)
             if item is not None:
                 self.goto(itemid=item.id)
         elif itemid is not None:
-            item = self._getFromItemId(itemid)
+            item = self._getCached(itemid)
             if item is not None:
                 self.goto(itemid=itemid)
         else:
@@ -162,7 +297,8 @@ class Indexer:
                 item = None
             else:
                 itemid = self.items[self.current]
-                item = self._getFromItemId(itemid)
+                item = self._getCached(itemid)
+                self._prefetch()
 
         self.item = item
 
@@ -170,18 +306,38 @@ class Indexer:
 class EventIndexer(Indexer):
     """Indexes Events database providing a convenient way to establish order
     among the items.
+
+    Committed Events are written to the database together, once `commitsize`
+    of them were committed or when the indexer is closed, see `flush`.
+
+    Attributes
+    ----------
+    commitsize : int
+      number of committed Events written to the database at once
     """
-    def __init__(self, URI=None):
-        super().__init__()
+    commitsize = 50
+    # Frames of the Events are loaded in the same query, with a join
+    _byItemId = _itemIdQuery(Event).options(joinedload(Event.frame))
+    _byFrameId = _frameIdQuery(Event).options(joinedload(Event.frame))
 
-        if URI is not None:
+    def __init__(self, URI=None):
+        # committed Events not yet written to the database, keyed by their ids
+        self._pending = {}
+        # initFromDB initializes the indexer itself, with the indexed items
+        if URI is None:
+            super().__init__()
+        else:
             self.initFromDB(URI)
 
     def initFromDB(self, uri):
         """Connects to a database and indexes all Events therein."""
+        # pending Events have to be written before connecting to another DB
+        self.close()
         res.connect2db(uri)
         with res.session_scope() as session:
-            events = [id for id, in session.query(Event.id).all()]
+            query = session.query(Event.id).order_by(Event.id)
+            events = [id for id, in query.all()]
+        self._session = res.Session(expire_on_commit=False)
         super().__init__(items=events)
 
     def _getFromFrameId(self, run, camcol, filter, field, which=0):
@@ -205,24 +361,16 @@ class EventIndexer(Indexer):
           if multiple Events are returned, which one in particular is wanted
 
         """
-        with res.session_scope() as session:
-            query = session.query(Event).filter(Event.run == run,
-                                                Event.filter == filter,
-                                                Event.camcol == camcol,
-                                                Event.field == field)
-            events = query.all()
-            if len(events) > 1:
-                event = events[which][0]
-            elif len(events) == 1:
-                event = events[0]
-            else:
-                return None
+        with self._readScope() as session:
+            # only the wanted row is selected and sent by the database
+            params = dict(run=run, camcol=camcol, filter=filter, field=field,
+                          which=which)
+            event = session.execute(self._byFrameId, params).scalar()
 
-            # session.expunge(event) --> SOMEHOW NOW MAGICALLY CASCADES ON
-            # EXPUNGE HAPPEN?!
-            session.expunge(event.frame)
-
-        return event
+        # Event and its eagerly loaded Frame were expunged by _readScope
+        if event is None:
+            return None
+        return self._pending.get(event.id, event)
 
     def _getFromItemId(self, eventid):
         """Given an unique Event id queries the database for the row and
@@ -235,47 +383,108 @@ class EventIndexer(Indexer):
           unique id of the desired Event
 
         """
-        with res.session_scope() as session:
-            q = session.query(Event)
-            q = q.filter(Event.id == eventid)
-            event = q.first()
-            if event is not None:
-                # session.expunge(event) --> SOMEHOW NOW MAGICALLY CASCADES ON
-                # EXPUNGE HAPPEN?!
-                session.expunge(event.frame)
+        with self._readScope() as session:
+            event = session.execute(self._byItemId,
+                                    {"itemid": eventid}).scalar()
 
         return event
 
+    def _getFromItemIds(self, eventids):
+        """Given a list of unique Event ids queries the database for the
+        rows and returns them as a list of Events.
+        The returned objects are expunged from the database session.
+
+        Parameters
+        -----------
+        eventids : list
+          unique ids of the desired Events
+
+        """
+        with res.session_scope() as session:
+            q = session.query(Event).options(joinedload(Event.frame))
+            q = q.filter(Event.id.in_(eventids))
+            events = q.all()
+            session.expunge_all()
+
+        return events
+
+    def _getCached(self, itemid):
+        """Returns the Event with the given unique id, see
+        `Indexer._getCached`. Committed Events that were not yet written to
+        the database are newer than the ones in it and are returned instead.
+        """
+        if itemid in self._pending:
+            return self._pending[itemid]
+        return super()._getCached(itemid)
+
     @property
     def event(self):
         """Returns the event pointed to by the current index."""
         return self.item
 
     def commit(self):
-        """Add the object back to the session and commit any changes made to
-        it.
+        """Marks the current Event as verified and commits any changes made to
+        it. Changes are written to the database once `commitsize` Events were
+        committed, see `flush`.
         """
         self.event.verified = True
-        with res.session_scope() as session:
-            session.add(self.event)
+        self._pending[self.event.id] = self.event
+        if len(self._pending) >= self.commitsize:
+            self.flush()
+
+    def flush(self):
+        """Writes all committed Events to the database in a single
+        transaction.
+        """
+        if not self._pending:
+            return
+
+        # pending Events were read in different sessions and can hold
+        # different copies of the same Frame, so instead of adding them their
+        # state is merged onto the rows loaded by this session
+        session = res.Session()
+        try:
+            for event in self._pending.values():
+                session.merge(event)
             session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+            # failed changes are not retried on every following commit
+            self._pending.clear()
+
+    def close(self):
+        """Writes any committed Events to the database and closes the
+        session used to read them.
+        """
+        self.flush()
+        super().close()
 
 
 class ImageIndexer(Indexer):
     """Indexes Image database providing a convenient way to establish order
     among the items.
     """
-    def __init__(self, URI=None):
-        super().__init__()
+    _byItemId = _itemIdQuery(Image)
+    _byFrameId = _frameIdQuery(Image)
 
-        if URI is not None:
+    def __init__(self, URI=None):
+        # initFromDB initializes the indexer itself, with the indexed items
+        if URI is None:
+            super().__init__()
+        else:
             self.initFromDB(URI)
 
     def initFromDB(self, uri):
         """Connects to a database and indexes all Images therein."""
         imagedb.connect2db(uri)
         with imagedb.session_scope() as session:
-            images = [id for id, in session.query(Image.id).all()]
+            query = session.query(Image.id).order_by(Image.id)
+            images = [id for id, in query.all()]
+        self.close()
+        self._session = imagedb.Session(expire_on_commit=False)
         super().__init__(items=images)
 
     def _getFromFrameId(self, run, camcol, filter, field, which=0):
@@ -299,17 +508,12 @@ class ImageIndexer(Indexer):
           if multiple items are returned, which one in particular is wanted
 
         """
-        with imagedb.session_scope() as session:
-            query = session.query(Image).filter(Image.run == run,
-                                                Image.filter == filter,
-                                                Image.camcol == camcol,
-                                                Image.field == field)
-            images = query.all()
-            if len(images) > 1:
-                image = images[which][0]
-            elif len(images) == 1:
-                image = images[0]
-            else:
+        with self._readScope() as session:
+            # only the wanted row is selected and sent by the database
+            params = dict(run=run, camcol=camcol, filter=filter, field=field,
+                          which=which)
+            image = session.execute(self._byFrameId, params).scalar()
+            if image is None:
                 return None
 
             session.expunge(image)
@@ -326,14 +530,31 @@ class ImageIndexer(Indexer):
           unique id of the desired Event
 
         """
-        with imagedb.session_scope() as session:
-            query = session.query(Image)
-            query = query.filter(Image.id == imageid)
-            image = query.first()
+        with self._readScope() as session:
+            image = session.execute(self._byItemId,
+                                    {"itemid": imageid}).scalar()
             if image is not None:
                 session.expunge(image)
         return image
 
+    def _getFromItemIds(self, imageids):
+        """Given a list of unique image ids queries the database for the
+        rows and returns them as a list of Images.
+        The returned objects are expunged from the database session.
+
+        Parameters
+        -----------
+        imageids : list
+          unique ids of the desired Images
+
+        """
+        with imagedb.session_scope() as session:
+            query = session.query(Image)
+            query = query.filter(Image.id.in_(imageids))
+            images = query.all()
+            session.expunge_all()
+        return images
+
     @property
     def image(self):
         """Returns the image pointed to by the current index."""
@@ -41,15 +41,6 @@ class RightFrame(ttk.Frame):
         case of failure.
 
         """
-        # realistically this consists only of clearing the table displaying the
-        # prvious Event information and setting a label with error message.
-        for widget in self.topRight.winfo_children():
-            widget.destroy()
-
-        style = ttk.Style()
-        style.configure("NoImageFound.TLabel", background="red2",
-                        font=("Helvetica", 20))
-
-        ttk.Label(self.topRight, style="NoImageFound.TLabel",
-                  text="NO IMAGE DATA\nFOUND").grid(
-                      row=0, columnspan=2, padx=50, pady=(50, 0))
+        # realistically this consists only of hiding the table displaying the
+        # previous Event information and showing a label with error message.
+        self.topRight.failedEventLoadScreen()
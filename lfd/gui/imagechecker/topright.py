@@ -2,7 +2,7 @@ from tkinter import (TOP,
                      BOTH,
                      RIDGE)
 from tkinter import ttk
-from lfd.gui.utils import multi_getattr
+from operator import attrgetter
 
 
 class TopRight(ttk.Frame):
@@ -29,49 +29,94 @@ class TopRight(ttk.Frame):
         self.unverified_color = "DarkGoldenrod1"
         self.falsepositive_color = "red"
         self.positive_color = "DarkOliveGreen3"
+        # colors the table styles were last configured with
+        self._styledColors = None
 
         self.parent = parent
         self.data = parent.root.data
 
+        style = ttk.Style()
+        style.configure("NoImageFound.TLabel", background="red2",
+                        font=("Helvetica", 20))
+
+        # widgets are created once, updating the table only reconfigures them
+        # spacer between top of window and table
+        self.spacer = ttk.Label(self)
+        self.spacer.grid(row=0, columnspan=2, padx=50, pady=13)
+        self.failedLabel = ttk.Label(self, style="NoImageFound.TLabel",
+                                     text="NO IMAGE DATA\nFOUND")
+        self.failedLabel.grid(row=0, columnspan=2, padx=50, pady=(50, 0))
+        self.failedLabel.grid_remove()
+
+        self._keyLabels, self._valueLabels = [], []
         self.displayKeys = ["run", "camcol", "filter", "field", "frame.t.iso"]
 
+    @property
+    def displayKeys(self):
+        """Keys displayed in the information table of the Event."""
+        return self._displayKeys
+
+    @displayKeys.setter
+    def displayKeys(self, keys):
+        # dotted keys are resolved once, not on every redraw of the table
+        self._displayKeys = keys
+        self._getters = [attrgetter(key) for key in keys]
+
+        for label in self._keyLabels + self._valueLabels:
+            label.destroy()
+        # labels remember their place in the grid but are shown only once the
+        # data of an Event is displayed, see updateImageData
+        self._keyLabels, self._valueLabels = [], []
+        for row, key in enumerate(keys, 1):
+            keyLabel = ttk.Label(self, text=key, width=10)
+            keyLabel.grid(row=row, column=0, padx=(25, 0))
+            keyLabel.grid_remove()
+            valueLabel = ttk.Label(self, width=25)
+            valueLabel.grid(row=row, column=1, padx=(0, 40))
+            valueLabel.grid_remove()
+            self._keyLabels.append(keyLabel)
+            self._valueLabels.append(valueLabel)
+
     def updateImageData(self):
-        """Clears the currently displayed table, and draws a new table
-        displaying the data of currently loaded Event. If there is no Event
-        currently loaded, raises an IndexError (since the index of current
-        Event is None).
+        """Updates the displayed table with the data of currently loaded Event.
+        If there is no Event currently loaded, raises an AttributeError.
 
         """
-        # This is repeated in the failedEventLoadScreen and here so that the
-        # order of the calls to these two functions would not matter
-        for widget in self.winfo_children():
-            widget.destroy()
         event = self.data.event
 
-        # spacer between top of window and table
-        ttk.Label(self).grid(row=0, columnspan=2, padx=50, pady=13)
+        # styles are only reconfigured when the colors were changed
+        colors = (self.unverified_color, self.falsepositive_color,
+                  self.positive_color)
+        if colors != self._styledColors:
+            style = ttk.Style()
+            style.configure("Unverified.TLabel", background=self.unverified_color,
+                            relief=RIDGE)
+            style.configure("FalsePositive.TLabel",
+                            background=self.falsepositive_color, relief=RIDGE)
+            style.configure("Positive.TLabel", background=self.positive_color,
+                            relief=RIDGE)
+            self._styledColors = colors
 
-        style = ttk.Style()
-        style.configure("Unverified.TLabel", background=self.unverified_color,
-                        relief=RIDGE)
-        style.configure("FalsePositive.TLabel", background=self.falsepositive_color,
-                        relief=RIDGE)
-        style.configure("Positive.TLabel", background=self.positive_color,
-                        relief=RIDGE)
-
-        for row, key in enumerate(self.displayKeys, 1):
-            if not event.verified:
-                pickedStyle = "Unverified.TLabel"
-            elif event.false_positive:
-                pickedStyle = "FalsePositive.TLabel"
-            else:
-                pickedStyle = "Positive.TLabel"
-
-            ttk.Label(self, text=key, style=pickedStyle, width=10).grid(
-                row=row, column=0, padx=(25, 0))
-            ttk.Label(self, text=multi_getattr(event, key), style=pickedStyle,
-                      width=25).grid(row=row, column=1, padx=(0, 40))
-            row += 1
-
-        # spacer between topright and botright
-        ttk.Label(self).grid(row=0, columnspan=2, padx=50, pady=13)
+        if not event.verified:
+            pickedStyle = "Unverified.TLabel"
+        elif event.false_positive:
+            pickedStyle = "FalsePositive.TLabel"
+        else:
+            pickedStyle = "Positive.TLabel"
+
+        # the table could have been hidden by failedEventLoadScreen
+        self.failedLabel.grid_remove()
+        self.spacer.grid()
+        labels = zip(self._getters, self._keyLabels, self._valueLabels)
+        for getter, keyLabel, valueLabel in labels:
+            keyLabel.configure(style=pickedStyle)
+            keyLabel.grid()
+            valueLabel.configure(text=getter(event), style=pickedStyle)
+            valueLabel.grid()
+
+    def failedEventLoadScreen(self):
+        """Hides the table and displays an error message instead."""
+        self.spacer.grid_remove()
+        for label in self._keyLabels + self._valueLabels:
+            label.grid_remove()
+        self.failedLabel.grid()
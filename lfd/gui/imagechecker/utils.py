@@ -1,9 +1,16 @@
 import glob
+import re
+from os.path import basename
 
 import lfd.results as res
 from lfd.gui.imagechecker import imagedb
 
 
+_FRAME_RE = re.compile(r"frame-(?P<filter>[a-z])-(?P<run>\d+)-(?P<camcol>\d)"
+                       r"-(?P<field>\d+)\.")
+"""Matches SDSS style filenames, see filename2frameId."""
+
+
 def frameId2Filename(run, camcol, filter, field, fileext="fits.png"):
     """Translates between frame identifiers and  SDSS style filename of the::
 
@@ -24,7 +31,7 @@ def frameId2Filename(run, camcol, filter, field, fileext="fits.png"):
     fileext : str
       file extension (.png, .jpeg etc...)
     """
-    if not all([run, camcol, filter, field]):
+    if run is None or camcol is None or filter is None or field is None:
         return None
     return f"frame-{filter}-{run:06d}-{camcol}-{field:04}.{fileext}"
 
@@ -42,14 +49,12 @@ def filename2frameId(filename):
     filename : str
       just the filename, no prepended path
     """
-    parts = filename.split("-")
+    match = _FRAME_RE.match(filename)
+    if match is None:
+        raise ValueError(f"Not an SDSS style filename: {filename}")
 
-    run = int(parts[2])
-    camcol = int(parts[3])
-    filter = parts[1]
-    field = int(parts[-1].split(".")[0])
-
-    return run, camcol, filter, field
+    return (int(match["run"]), int(match["camcol"]), match["filter"],
+            int(match["field"]))
 
 
 def filepath2frameId(filepath):
@@ -64,7 +69,7 @@ def filepath2frameId(filepath):
     filepath : str
       path-like string
     """
-    return filename2frameId(filepath.split("/")[-1])
+    return filename2frameId(basename(filepath))
 
 
 def eventId2FrameId(eventid):
@@ -98,9 +103,12 @@ def eventId2Filename(eventid, fileext="fits.png"):
     return frameId2Filename(run, camcol, filter, field, fileext)
 
 
-def create_imageDB(filenamestr, saveURI, echo=False):
+def create_imageDB(filenamestr, saveURI, echo=False, batchsize=1000):
     """Finds all paths to matching files given by filenamestr, extracts their
-    frame identifiers and stores them in a database given by saveURI.
+    frame identifiers and stores them in a database given by saveURI. Images
+    are inserted and committed in batches as the files are found, so the
+    whole list of files is never held in memory. Rows are inserted directly,
+    no Image objects are created.
 
     Examples
     --------
@@ -118,16 +126,26 @@ def create_imageDB(filenamestr, saveURI, echo=False):
       wildcarded string that will be used to match all desired image files
     saveURI : str
       URI containing type and location of the images database
+    echo : bool
+      verbosity of the DB. False by default.
+    batchsize : int
+      number of images inserted at a time. Default: 1000
 
     """
     imagedb.connect2db(saveURI, echo)
-    files = glob.glob(filenamestr)
-    images = []
-
-    for filepath in files:
-        run, camcol, filter, field = filepath2frameId(filepath)
-        images.append(imagedb.Image(run, camcol, filter, field, filepath))
 
+    insert = imagedb.Image.__table__.insert()
     with imagedb.session_scope() as session:
-        session.add_all(images)
-        session.commit()
+        rows = []
+        for filepath in glob.iglob(filenamestr):
+            run, camcol, filter, field = filepath2frameId(filepath)
+            rows.append({"run": run, "camcol": camcol, "filter": filter,
+                         "field": field, "imgpath": filepath})
+            if len(rows) == batchsize:
+                session.execute(insert, rows)
+                session.commit()
+                rows.clear()
+
+        if rows:
+            session.execute(insert, rows)
+            session.commit()
@@ -3,6 +3,8 @@ module, hopefully, alleviates some of issues wen dealing with timestamps by
 defining a new database type decorator that will wrap the awkward SDSS TAI
 timestamps into a more pleasant OO interface by using Astropy Time objects.
 """
+import functools
+
 import sqlalchemy as sql
 from sqlalchemy.types import TypeDecorator
 
@@ -36,6 +38,15 @@ def timestr(obj):
     return "Time({0})".format(obj.iso)
 
 
+@functools.lru_cache(maxsize=4096)
+def _sdsstai2time(value):
+    """Converts an SDSS TAI timestamp into an Astropy Time object. Creating
+    Time objects is expensive so they are cached, rows read from the DB that
+    share a timestamp share the same Time object.
+    """
+    return Time(value/(24.0*3600.0), format="mjd")
+
+
 class BasicTime(TypeDecorator):
     """A class that will force storing time stamps in the SDSS TAI format and
     will force read-out of the timestamp from the DB as an Astropy Time object.
@@ -62,10 +73,11 @@ class BasicTime(TypeDecorator):
     def process_result_value(self, value, dialect):
         """Used to map read values from the DB to a format appropriate for
         interactive work. Expects an SDSS TAI format float value and returns an
-        Astropy Time object.
+        Astropy Time object. The returned Time objects are shared between rows
+        with the same timestamp and should not be modified in place.
         """
         if value is not None:
-            return Time(value/(24.0*3600.0), format="mjd")
+            return _sdsstai2time(value)
         return None
 
 
@@ -1,8 +1,18 @@
+import numpy as np
+
 from lfd.results import ccd_dimensions as ccd
 
 
-__all__ = ["convert_ccd2frame", "convert_frame2ccd",
-           "CoordinateConversionError"]
+__all__ = ["convert_ccd2frame", "convert_frame2ccd", "convert_ccd2frame_batch",
+           "convert_frame2ccd_batch", "CoordinateConversionError"]
+
+
+_CAMCOL_PITCH = ccd.W_CAMCOL + ccd.W_CAMCOL_SPACING
+_FILTER_PITCH = ccd.H_FILTER + ccd.H_FILTER_SPACING
+# filters in the order of the rows of CCDs, starting from the top
+_INT_TO_FILTER = ("r", "i", "u", "z", "g")
+_FILTER_TO_INT = {filter: i for i, filter in enumerate(_INT_TO_FILTER)}
+_FILTERS = np.array(_INT_TO_FILTER)
 
 
 class CoordinateConversionError(ArithmeticError):
@@ -88,20 +98,20 @@ def get_filter_int(filter):
      z -> 3
      g -> 4
     """
-    return {"r": 0, "i": 1, "u": 2, "z": 3, "g": 4}[filter]
+    return _FILTER_TO_INT[filter]
 
 
 def get_filter_from_int(filterint):
     """Provides translation between an integer row value of the filter and its
-    string value where the top row is indexed with a zero::
+    string value where the top row is indexed with a one::
 
-     0 -> r
-     1 -> i
-     2 -> u
-     3 -> z
-     4 -> g
+     1 -> r
+     2 -> i
+     3 -> u
+     4 -> z
+     5 -> g
     """
-    return ["r", "i", "u", "z", "g"][filterint-1]
+    return _INT_TO_FILTER[filterint-1]
 
 
 def convert_ccd2frame(x, y):
@@ -111,49 +121,32 @@ def convert_ccd2frame(x, y):
      x = cx - {camcol} * (W_CAMCOL + W_CAMCOL_SPACING)
      y = cy - {filter} * (H_FILTER + H_FILTER_SPACING)
 
-    Where camcol and filter are iterated over untill a possible sollution is
-    found. A sollution is possible if it is contained within the width and
-    height of a single CCD respective to its (0, 0) point in the frame coord.
-    system. Only one such sollution is guaranteed to exists.
+    Where camcol and filter are the whole number of CCD and spacing widths and
+    heights that fit in x and y. A sollution is possible if it is contained
+    within the width and height of a single CCD respective to its (0, 0) point
+    in the frame coord. system. Only one such sollution is guaranteed to
+    exists.
 
     """
     res = [None, None, None, "nofilter"]
-    solved_camcol = False
-    solved_filter = False
-
-    # whatever you have in your book is wrong, you messed something up in your
-    # notes? Given a camcol and filter the annon funcs calculate the coords
-    # in the frame coord sys. on the given single CCD at (camcol, filter)
-    def newx(camcol):
-        return x - camcol * (ccd.W_CAMCOL + ccd.W_CAMCOL_SPACING)
-
-    def newy(camcol):
-        return y - filter * (ccd.H_FILTER + ccd.H_FILTER_SPACING)
-
-    # to invert the solution we iterate over all camcols and only one camcol
-    # will produce a value of x coordinate contained within the respective CCD.
-    # We store the calculated frame x coordinate and the respective camcol
-    for i in range(0, 6):
-        tmp = newx(i)
-        if tmp >= 0 and tmp <= ccd.W_CAMCOL:
-            res[0] = tmp
-            res[2] = i+1
-            solved_camcol = True
-            break
-
-    # procedure is repeated for filters, only one filter will produce a valid
-    # value of frame y coordinate, we remember the coord and the filter.
-    for i in range(0, 5):
-        tmp = newy(i)
-        if tmp >= 0 and tmp <= ccd.H_FILTER:
-            res[1] = tmp
-            res[3] = get_filter_from_int(i+1)
-            solved_filter = True
-            break
+
+    # the CCDs are evenly spaced so the camcol and filter follow directly from
+    # the number of whole CCD+spacing widths and heights fitting in (x, y).
+    # What remains is the frame coordinate, if it's larger than a single CCD
+    # the coordinate fell into the gap between two CCDs
+    camcol, rx = divmod(x, _CAMCOL_PITCH)
+    if 0 <= camcol <= 5 and rx <= ccd.W_CAMCOL:
+        res[0] = rx
+        res[2] = int(camcol) + 1
+
+    filter, ry = divmod(y, _FILTER_PITCH)
+    if 0 <= filter <= 4 and ry <= ccd.H_FILTER:
+        res[1] = ry
+        res[3] = get_filter_from_int(int(filter) + 1)
 
     # it is possible no solutions are found if the CCD coordinates fall in the
     # gaps between CCD array columns and rows. We check:
-    if solved_camcol and solved_filter:
+    if res[2] is not None and res[3] != "nofilter":
         return res
     else:
         raise CoordinateConversionError((x, y), res)
@@ -184,3 +177,95 @@ def convert_frame2ccd(x, y, camcol, filter):
     newy = y + filter * (ccd.H_FILTER + ccd.H_FILTER_SPACING)
 
     return [newx, newy]
+
+
+def convert_ccd2frame_batch(x, y):
+    """Converts arrays of coordinates (x, y) from the CCD coordinate system to
+    the frame coordinate system. See convert_ccd2frame for the formulae.
+
+    Parameters
+    ----------
+    x : np.array
+      x coordinates in the CCD coordinate system
+    y : np.array
+      y coordinates in the CCD coordinate system
+
+    Returns
+    -------
+    x : np.array
+      x coordinates in the frame coordinate system
+    y : np.array
+      y coordinates in the frame coordinate system
+    camcol : np.array(int)
+      camcols the coordinates are on
+    filter : np.array(str)
+      filters the coordinates are on
+
+    Raises
+    ------
+    CoordinateConversionError
+      if any of the coordinates fall in the gaps between the CCDs, the error
+      holds all such coordinates.
+    """
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+
+    camcol, rx = np.divmod(x, _CAMCOL_PITCH)
+    filter, ry = np.divmod(y, _FILTER_PITCH)
+
+    solved = ((camcol >= 0) & (camcol <= 5) & (rx <= ccd.W_CAMCOL)
+              & (filter >= 0) & (filter <= 4) & (ry <= ccd.H_FILTER))
+    if not solved.all():
+        unsolved = ~solved
+        raise CoordinateConversionError((x[unsolved], y[unsolved]),
+                                        (rx[unsolved], ry[unsolved]))
+
+    camcol = camcol.astype(int)
+    filter = filter.astype(int)
+    return rx, ry, camcol + 1, _FILTERS[filter]
+
+
+def convert_frame2ccd_batch(x, y, camcol, filter):
+    """Converts arrays of frame coordinates (x, y, camcol, filter) to CCD
+    coordinates (cx, cy). See convert_frame2ccd for the formulae.
+
+    Parameters
+    ----------
+    x : np.array
+      x coordinates in the frame coordinate system
+    y : np.array
+      y coordinates in the frame coordinate system
+    camcol : np.array(int)
+      camcols, 1 to 6
+    filter : np.array(str) or np.array(int)
+      filters, either as strings from {riuzg} or integers, see
+      convert_frame2ccd
+
+    Returns
+    -------
+    cx : np.array
+      x coordinates in the CCD coordinate system
+    cy : np.array
+      y coordinates in the CCD coordinate system
+    """
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    camcol, filter = np.asarray(camcol), np.asarray(filter)
+
+    if filter.dtype.kind in "US":
+        rows = np.full(filter.shape, -1)
+        for i, name in enumerate(_FILTERS):
+            rows[filter == name] = i
+        unknown = rows < 0
+    else:
+        rows = filter
+        unknown = (rows < 1) | (rows > 5)
+    if unknown.any():
+        raise ValueError("Unrecognized filter: {0}".format(filter[unknown]))
+
+    unknown = (camcol < 1) | (camcol > 6)
+    if unknown.any():
+        raise ValueError("Unrecognized camcol: {0}".format(camcol[unknown]))
+
+    newx = x + (camcol - 1) * _CAMCOL_PITCH
+    newy = y + rows * _FILTER_PITCH
+
+    return newx, newy
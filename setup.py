@@ -20,7 +20,7 @@ setup(
         'matplotlib',
         'scipy',
         'scikit-learn',
-        'SQLAlchemy',
+        'SQLAlchemy>=1.4',
         'astropy',
         'fitsio',
         'Pillow',
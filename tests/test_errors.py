@@ -0,0 +1,71 @@
+"""Tests of reading the qsub and detecttrails error logs."""
+import os
+import sys
+
+import pytest
+
+# errors is a standalone script module, importing createjobs as a sibling
+LFD = os.path.join(os.path.dirname(__file__), os.pardir, "lfd")
+sys.path[:0] = [os.path.join(LFD, "errors"), os.path.join(LFD, "createjobs")]
+import errors  # noqa: E402
+
+
+LOG = """some header junk
+{entries}0,1,0,r
+"""
+
+ENTRY = """{run},{camcol},{field},{filter}
+Traceback (most recent call last):
+  line 1
+  line 2
+  line 3
+  line 4
+  line 5
+  line 6
+ValueError: error in {run}
+"""
+
+
+@pytest.fixture
+def logs(tmp_path):
+    """Empty qsub error directory and a detecttrails log of 4 failed frames
+    of 3 runs."""
+    frames = [(2888, 1, 139, "i"), (94, 6, 12, "u"), (2888, 2, 140, "r"),
+              (1000, 3, 1, "z")]
+    entries = "".join(ENTRY.format(run=run, camcol=camcol, field=field,
+                                   filter=filter)
+                      for run, camcol, field, filter in frames)
+    log = tmp_path / "detecttrails.log"
+    log.write_text(LOG.format(entries=entries))
+    qsub = tmp_path / "qsub"
+    qsub.mkdir()
+    return str(qsub), str(log)
+
+
+def test_parse_log(logs):
+    errs = errors.Errors(*logs)
+    assert len(errs) == 4
+    assert errs.dettrails["run"].tolist() == [2888, 94, 2888, 1000]
+    assert errs.dettrails["filter"].tolist() == ["i", "u", "r", "z"]
+    assert errs.dettrails["err_code"].tolist()[1] == "ValueError: error in 94"
+
+
+def test_runs_of_log(logs):
+    errs = errors.Errors(*logs)
+    assert errs._genRunsDT() == [2888, 94, 1000]
+
+
+def test_parse_short_entry(tmp_path):
+    # the second entry has no error code line, it must not run into the next
+    short = "94,6,12,u\nValueError: short\n"
+    entries = (ENTRY.format(run=2888, camcol=1, field=139, filter="i") +
+               short +
+               ENTRY.format(run=1000, camcol=3, field=1, filter="z"))
+    log = tmp_path / "detecttrails.log"
+    log.write_text(LOG.format(entries=entries))
+
+    errs = errors.DetectTrailsLogs.fromFile(str(log)).errors
+    assert errs["run"].tolist() == [2888, 94, 1000]
+    assert errs["err_code"].tolist() == ["ValueError: error in 2888", "",
+                                         "ValueError: error in 1000"]
+    assert errs["error"].tolist()[1] == "\nValueError: short\n"
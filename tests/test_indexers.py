@@ -0,0 +1,91 @@
+"""Tests of the indexers used by the image checker to browse through the
+Events and Images databases.
+"""
+import threading
+
+import pytest
+
+from lfd import results as res
+from lfd.gui.imagechecker import indexers
+
+
+FRAME = dict(run=1, camcol=1, filter="r", field=1, crpix1=1, crpix2=1,
+             crval1=1, crval2=1, cd11=1e-4, cd12=0, cd21=0, cd22=1e-4,
+             t=4412911000.0)
+
+
+@pytest.fixture
+def eventsdb(tmp_path):
+    """Database with three Events on a single Frame."""
+    uri = "sqlite:///{0}".format(tmp_path / "events.db")
+    res.connect2db(uri)
+    with res.engine.begin() as conn:
+        conn.execute(res.Frame.__table__.insert(), FRAME)
+        for i in range(3):
+            conn.execute(res.Event.__table__.insert(), dict(
+                _run=1, _camcol=1, _filter="r", _field=1,
+                _x1=10, _y1=10+i, _x2=100, _y2=100+i,
+                _cx1=10, _cy1=10+i, _cx2=100, _cy2=100+i,
+                verified=False, false_positive=False))
+    return uri
+
+
+def stored():
+    """Returns (id, verified, false_positive) of all Events in the DB."""
+    with res.session_scope() as session:
+        query = session.query(res.Event.id, res.Event.verified,
+                              res.Event.false_positive)
+        return query.order_by(res.Event.id).all()
+
+
+def test_flush_across_chunks(eventsdb, monkeypatch):
+    # Events of different chunks are loaded in different sessions, each with
+    # its own copy of the shared Frame
+    monkeypatch.setattr(indexers.Indexer, "chunksize", 2)
+    indexer = indexers.EventIndexer(eventsdb)
+    for i in range(3):
+        indexer.event.false_positive = True
+        indexer.commit()
+        indexer.next()
+    indexer.close()
+
+    assert stored() == [(1, True, True), (2, True, True), (3, True, True)]
+    assert indexer._pending == {}
+
+
+def test_flush_commitsize(eventsdb, monkeypatch):
+    monkeypatch.setattr(indexers.Indexer, "chunksize", 2)
+    monkeypatch.setattr(indexers.EventIndexer, "commitsize", 2)
+    indexer = indexers.EventIndexer(eventsdb)
+    indexer.commit()
+    indexer.next()
+    indexer.next()
+    indexer.commit()
+
+    assert stored() == [(1, True, False), (2, False, False), (3, True, False)]
+    assert indexer._pending == {}
+    indexer.close()
+
+
+def test_flush_after_frame_lookup(eventsdb):
+    indexer = indexers.EventIndexer(eventsdb)
+    indexer.event.false_positive = True
+    indexer.commit()
+    # the Event is read again, along with a new copy of its Frame
+    indexer.get(run=1, camcol=1, filter="r", field=1, which=2)
+    indexer.commit()
+    indexer.get(run=1, camcol=1, filter="r", field=1, which=0)
+    assert indexer.event.false_positive
+    indexer.close()
+
+    assert stored() == [(1, True, True), (2, False, False), (3, True, False)]
+
+
+def test_close_stops_prefetching(eventsdb, monkeypatch):
+    monkeypatch.setattr(indexers.Indexer, "chunksize", 2)
+    nthreads = threading.active_count()
+    indexer = indexers.EventIndexer(eventsdb)
+    indexer.next()
+    assert threading.active_count() == nthreads + 1
+    indexer.close()
+    assert threading.active_count() == nthreads
@@ -0,0 +1,50 @@
+"""Tests of the bright and dim trail detection steps on synthetic images."""
+import cv2
+import numpy as np
+import pytest
+
+from lfd.detecttrails import DetectTrails
+from lfd.detecttrails.processfield import (fit_houghLines,
+                                           process_field_bright,
+                                           process_field_dim)
+
+
+def trail():
+    """A 32 bit image of a frame with a single bright trail across it."""
+    img = np.zeros((2048, 1489), np.float32)
+    cv2.line(img, (100, 1800), (1300, 200), 50.0, 3)
+    return img
+
+
+@pytest.fixture(params=["bright", "dim"])
+def process(request):
+    """Returns a detection step and its default parameters."""
+    detect = DetectTrails()
+    if request.param == "bright":
+        return process_field_bright, detect.params_bright
+    return process_field_dim, detect.params_dim
+
+
+def test_probabilistic_hough_finds_nothing():
+    img = np.zeros((100, 100), np.uint8)
+    assert fit_houghLines(img, 20, 3, probabilisticHough=True) is None
+
+
+def test_probabilistic_hough_threshold(process):
+    process, params = process
+    params = dict(params, probabilisticHough=True, houghThreshold=10**5)
+    assert process(trail(), **params) == (False, None)
+
+
+@pytest.mark.parametrize("probabilisticHough", [False, True])
+def test_theta_window_excludes_trail(process, probabilisticHough):
+    # the normal of the trail is at ~0.64 radians
+    process, params = process
+    params = dict(params, probabilisticHough=probabilisticHough,
+                  minTheta=1.4, maxTheta=1.6)
+    assert process(trail(), **params) == (False, None)
+
+
+def test_probabilistic_hough_detects_trail():
+    params = dict(DetectTrails().params_dim, probabilisticHough=True)
+    assert process_field_dim(trail(), **params)[0]
@@ -0,0 +1,57 @@
+"""Tests of blotting out the catalog objects in an image."""
+import numpy as np
+import pytest
+
+from lfd.detecttrails import removestars
+
+
+SHAPE = (200, 150)
+PARAMS = dict(defaultxy=10, filter_caps={f: 22.0 for f in "ugriz"},
+              maxxy=60, pixscale=0.396, magcount=3, maxmagdiff=5,
+              debug=False)
+
+
+@pytest.fixture
+def catalog(monkeypatch):
+    """Replaces the photoObj file of the field by the objects given to the
+    returned function. Objects are given by their (row, column) coordinates
+    and are blotted out in squares of 2*defaultxy pixels."""
+    def make(coords):
+        n = len(coords)
+        rows = np.repeat([[r] for r, c in coords], 5, axis=1).astype(np.int32)
+        cols = np.repeat([[c] for r, c in coords], 5, axis=1).astype(np.int32)
+        photoObj = (rows, cols, np.full((n, 5), 18.0), np.zeros((n, 5)),
+                    np.full(n, 6), np.full((n, 5), 6), np.ones(n, int),
+                    np.ones(n, int))
+        monkeypatch.setattr(removestars.files, "filename",
+                            lambda *args, **kwargs: "photoObj.fits")
+        monkeypatch.setattr(removestars, "_read_photoObj_cached",
+                            lambda path: photoObj)
+    return make
+
+
+def blotted(coords, dxy=PARAMS["defaultxy"]):
+    """Image with the squares of the objects, clipped to it, blotted out."""
+    img = np.ones(SHAPE, np.float32)
+    for row, col in coords:
+        img[max(col-dxy, 0):col+dxy, max(row-dxy, 0):row+dxy] = 0.0
+    return img
+
+
+def test_inside_objects(catalog):
+    coords = [(50, 60), (100, 100)]
+    catalog(coords)
+    img = removestars.remove_stars(np.ones(SHAPE, np.float32), 94, 1, "r",
+                                   11, **PARAMS)
+    np.testing.assert_array_equal(img, blotted(coords))
+
+
+def test_edge_objects(catalog):
+    # objects straddling each of the edges are blotted out only within the
+    # image, objects completely outside of it are skipped
+    edges = [(5, 60), (60, 3), (145, 60), (60, 195), (0, 0)]
+    outside = [(-30, 60), (60, -30), (200, 60), (60, 250)]
+    catalog(edges + outside)
+    img = removestars.remove_stars(np.ones(SHAPE, np.float32), 94, 1, "r",
+                                   11, **PARAMS)
+    np.testing.assert_array_equal(img, blotted(edges))
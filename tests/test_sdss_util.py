@@ -0,0 +1,52 @@
+"""Tests of the SDSS id and coordinate utilities."""
+import numpy as np
+import pytest
+
+from lfd.detecttrails.sdss import util
+
+
+@pytest.mark.parametrize("ra", [np.array([10, 350], "f4"), [10, 350],
+                                np.array([10., 350.])])
+def test_sdss_wrap(ra):
+    assert util.sdss_wrap(ra).tolist() == [10., -10.]
+
+
+def test_sdss_wrap_scalar():
+    assert util.sdss_wrap(350).tolist() == [-10.]
+
+
+@pytest.mark.parametrize("bits", [False, True])
+def test_photoid_scalar_roundtrip(bits):
+    photoid = util.get_photoid(1, 2, 3, 4, 5, bits=bits)
+    for pid in (photoid, np.int64(photoid)):
+        ids = util.photoid_extract(pid, as_tuple=True, bits=bits)
+        assert ids == (1, 2, 3, 4, 5)
+
+
+@pytest.mark.parametrize("bits", [False, True])
+def test_photoid_roundtrip(bits):
+    runs, fields = [94, 2888], [11, 139]
+    args = [runs, [301, 301], [1, 1], fields, [7, 8]]
+    photoids = util.get_photoid(*[np.array(arg) for arg in args], bits=bits)
+    for pids in (photoids, photoids.tolist()):
+        ids = util.photoid_extract(pids, bits=bits)
+        assert ids["run"].tolist() == runs
+        assert ids["field"].tolist() == fields
+        assert ids["id"].tolist() == [7, 8]
+
+
+@pytest.mark.parametrize("bits", [False, True])
+def test_photoid_mixed_inputs(bits):
+    photoids = util.get_photoid([94, 2888], 301, 1, [11, 139], 7, bits=bits)
+    ids = util.photoid_extract(photoids, as_tuple=True, bits=bits)
+    assert [arr.tolist() for arr in ids] == [[94, 2888], [301, 301], [1, 1],
+                                             [11, 139], [7, 7]]
+
+
+def test_objid_mixed_inputs():
+    objids = util.get_objid([94, 2888], 301, 1, [11, 139], 7)
+    assert objids.tolist()[0] == util.get_objid(94, 301, 1, 11, 7)
+    ids = util.objid_extract(objids)
+    assert ids["run"].tolist() == [94, 2888]
+    assert ids["rerun"].tolist() == [301, 301]
+    assert ids["field"].tolist() == [11, 139]